@@ -0,0 +1,128 @@
+'''Пакетная запись: проверка формами и bulk_create в одной транзакции.
+
+Каждая операция возвращает список результатов по позициям входного
+массива: {'index', 'status', 'id'} или {'index', 'status', 'errors'}.
+'''
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+
+from core.db import bulk_create_with_pks
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Follow, Group, Post, Recommendation
+from posts.rendering import render_post
+
+from .resources import ApiError
+
+User = get_user_model()
+
+CREATED = 'created'
+EXISTS = 'exists'
+ERROR = 'error'
+
+
+def _error(index, errors):
+    return {'index': index, 'status': ERROR, 'errors': errors}
+
+
+def _save(model, pending, results):
+    created = bulk_create_with_pks(model, [obj for _, obj in pending])
+    for (index, _), obj in zip(pending, created):
+        results[index] = {'index': index, 'status': CREATED, 'id': obj.pk}
+    return results
+
+
+def _items(items):
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ApiError(f'Элемент {index} должен быть объектом')
+        yield index, item
+
+
+def create_posts(user, items):
+    results, pending = [None] * len(items), []
+    # Группы разбираются одним запросом на пачку, а не полем формы
+    groups = Group.objects.in_bulk({
+        item['group'] for _, item in _items(items)
+        if isinstance(item.get('group'), int)})
+    for index, item in _items(items):
+        group_id = item.get('group')
+        group = groups.get(group_id) if isinstance(group_id, int) else None
+        form = PostForm(data={key: value for key, value in item.items()
+                              if key != 'group'})
+        errors = {} if form.is_valid() else dict(form.errors)
+        if group_id is not None and group is None:
+            errors['group'] = ['Группа не найдена']
+        if errors:
+            results[index] = _error(index, errors)
+            continue
+        post = form.save(commit=False)
+        post.author = user
+        post.group = group
+        # bulk_create не вызывает pre_save
+        pending.append((index, render_post(post)))
+    return _save(Post, pending, results)
+
+
+def create_comments(user, items):
+    results, pending = [None] * len(items), []
+    posts = Post.objects.in_bulk({
+        item['post'] for _, item in _items(items)
+        if isinstance(item.get('post'), int)})
+    for index, item in _items(items):
+        pk = item.get('post')
+        post = posts.get(pk) if isinstance(pk, int) else None
+        form = CommentForm(data=item)
+        if post is None:
+            results[index] = _error(index, {'post': ['Пост не найден']})
+        elif form.is_valid():
+            comment = form.save(commit=False)
+            comment.post = post
+            comment.author = user
+            pending.append((index, comment))
+        else:
+            results[index] = _error(index, form.errors)
+    return _save(Comment, pending, results)
+
+
+def create_follows(user, items):
+    results, pending = [None] * len(items), []
+    authors = {author.username: author for author in User.objects.filter(
+        username__in={item['author'] for _, item in _items(items)
+                      if isinstance(item.get('author'), str)})}
+    followed = _followed(user, authors.values())
+    for index, item in _items(items):
+        name = item.get('author')
+        author = authors.get(name) if isinstance(name, str) else None
+        if author is None:
+            results[index] = _error(index, {'author': ['Автор не найден']})
+        elif author == user:
+            results[index] = _error(
+                index, {'author': ['Нельзя подписаться на себя']})
+        elif author.pk in followed:
+            results[index] = {'index': index, 'status': EXISTS}
+        else:
+            followed.add(author.pk)
+            pending.append((index, Follow(user=user, author=author)))
+    try:
+        with transaction.atomic():
+            _save(Follow, pending, results)
+    except IntegrityError:
+        # Параллельный запрос успел создать часть подписок
+        _save_each_follow(pending, results)
+    Recommendation.objects.filter(user=user, author_id__in=[
+        follow.author_id for _, follow in pending]).delete()
+    return results
+
+
+def _followed(user, authors):
+    return set(Follow.objects.filter(
+        user=user, author__in=authors).values_list('author_id', flat=True))
+
+
+def _save_each_follow(pending, results):
+    for index, follow in pending:
+        try:
+            with transaction.atomic():
+                _save(Follow, [(index, follow)], results)
+        except IntegrityError:
+            results[index] = {'index': index, 'status': EXISTS}
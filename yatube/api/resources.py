@@ -0,0 +1,134 @@
+'''Описание ресурсов API: поля, курсорная пагинация и сериализация.
+
+Строки читаются через values_list только по запрошенным полям
+(sparse fieldsets), поэтому объекты моделей не создаются, а JOIN
+появляется лишь для полей вида author__username.
+'''
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import quote_etag
+
+
+class ApiError(Exception):
+    status = 400
+
+
+def image_url(name):
+    return default_storage.url(name) if name else None
+
+
+def error_response(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def json_response(request, data):
+    '''JSON-ответ с ETag; при совпадении If-None-Match — 304'''
+    body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+    response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = quote_etag(hashlib.md5(body.encode()).hexdigest())
+    return get_conditional_response(request, etag=response['ETag'],
+                                    response=response)
+
+
+class Resource:
+
+    def __init__(self, fields, order, default=None, converters=None):
+        self.fields = fields
+        self.order = order
+        self.default = default or tuple(fields)
+        self.converters = converters or {}
+
+    def field_names(self, request):
+        requested = request.GET.get('fields')
+        if not requested:
+            return self.default
+        names = tuple(name.strip() for name in requested.split(',')
+                      if name.strip())
+        unknown = set(names) - set(self.fields)
+        if unknown:
+            raise ApiError(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+        return names
+
+    def serialize(self, rows, names):
+        '''Список словарей только с запрошенными полями'''
+        converters = [self.converters.get(name) for name in names]
+        return [{name: converter(value) if converter else value
+                 for name, value, converter in zip(names, row, converters)}
+                for row in rows]
+
+    def get(self, request, queryset):
+        '''Один объект с запрошенными полями или None'''
+        names = self.field_names(request)
+        rows = queryset.values_list(*(self.fields[name] for name in names))
+        rows = list(rows[:1])
+        return self.serialize(rows, names)[0] if rows else None
+
+    def _encode_cursor(self, values):
+        # isoformat, а не DjangoJSONEncoder: тот обрезает микросекунды
+        raw = json.dumps([value.isoformat() if hasattr(value, 'isoformat')
+                          else value for value in values])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def _parse_date(value):
+        '''Дата из курсора; курсоры выдаются только с часовым поясом'''
+        date = parse_datetime(value)
+        if date is None or timezone.is_naive(date):
+            raise ValueError(value)
+        return date
+
+    def _decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(self.order):
+                raise ValueError(cursor)
+            return [self._parse_date(value) if field.endswith('date')
+                    else int(value)
+                    for (field, _), value in zip(self.order, values)]
+        except (TypeError, ValueError):
+            raise ApiError('Неверный курсор')
+
+    def _after(self, values):
+        '''Условие «строго после курсора» для составного порядка'''
+        condition = Q()
+        equal = {}
+        for (field, descending), value in zip(self.order, values):
+            lookup = f'{field}__{"lt" if descending else "gt"}'
+            condition |= Q(**equal, **{lookup: value})
+            equal[field] = value
+        return condition
+
+    def page(self, request, queryset):
+        '''Страница результатов и курсор следующей страницы'''
+        names = self.field_names(request)
+        try:
+            limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+        except ValueError:
+            raise ApiError('Неверный limit')
+        limit = max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+        queryset = queryset.order_by(*(
+            f'-{field}' if descending else field
+            for field, descending in self.order))
+        cursor = request.GET.get('cursor')
+        if cursor:
+            queryset = queryset.filter(self._after(
+                self._decode_cursor(cursor)))
+        paths = [self.fields[name] for name in names]
+        keys = [field for field, _ in self.order]
+        rows = list(queryset.values_list(*paths, *keys)[:limit + 1])
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._encode_cursor(list(rows[-1][len(paths):]))
+        return {'results': self.serialize(rows, names),
+                'next': next_cursor}
@@ -0,0 +1,144 @@
+import json
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api import batch
+from notifications.models import Event
+from posts.models import Comment, Follow, Group, Post, Recommendation
+from stats.models import DailyStat
+
+User = get_user_model()
+
+
+class ApiBatchTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.author = User.objects.create_user(username='author')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.group = Group.objects.create(title='Тестовая группа',
+                                          slug='test_group')
+        self.post = Post.objects.create(text='Тестовый текст',
+                                        author=self.author)
+
+    def send(self, name, items, client=None):
+        client = client or self.authorized_client
+        return client.post(reverse(f'api:{name}'),
+                           json.dumps({'items': items}),
+                           content_type='application/json')
+
+    def test_batch_posts(self):
+        '''Посты проверяются формой и создаются одной пачкой'''
+        response = self.send('batch_posts', [
+            {'text': 'Первый', 'group': self.group.pk},
+            {'text': ''},
+            {'text': 'Второй'}])
+        results = response.json()['results']
+        self.assertEqual([item['status'] for item in results],
+                         ['created', 'error', 'created'])
+        self.assertIn('text', results[1]['errors'])
+        first = Post.objects.get(pk=results[0]['id'])
+        self.assertEqual((first.text, first.group, first.author),
+                         ('Первый', self.group, self.user))
+        self.assertEqual(Post.objects.get(pk=results[2]['id']).text,
+                         'Второй')
+        self.assertEqual((first.excerpt, first.text_html),
+                         ('Первый', '<p>Первый</p>'))
+
+    def test_batch_posts_query_count_does_not_grow(self):
+        '''Кеши, статистика и события обновляются один раз на пачку'''
+        counts = []
+        # Первая пачка ещё создаёт строки DailyStat дня
+        for size in (1, 2, 10):
+            items = [{'text': f'Пост {number}', 'group': self.group.pk}
+                     for number in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                self.send('batch_posts', items)
+            counts.append(len(queries))
+        self.assertEqual(counts[1], counts[2])
+        self.assertEqual(Event.objects.filter(
+            post__group=self.group).count(), 13)
+        stat = DailyStat.objects.get(group=self.group)
+        self.assertEqual(stat.posts, 13)
+
+    def test_batch_posts_unknown_group(self):
+        response = self.send('batch_posts', [{'text': 'Пост', 'group': 0}])
+        result = response.json()['results'][0]
+        self.assertEqual(result['status'], 'error')
+        self.assertIn('group', result['errors'])
+
+    def test_batch_comments(self):
+        '''Комментарии к несуществующим постам и запретные слова отклоняются'''
+        response = self.send('batch_comments', [
+            {'post': self.post.pk, 'text': 'Отлично'},
+            {'post': 0, 'text': 'Никуда'},
+            {'post': self.post.pk, 'text': 'Пушкин'}])
+        statuses = [item['status'] for item in response.json()['results']]
+        self.assertEqual(statuses, ['created', 'error', 'error'])
+        self.assertEqual(Comment.objects.get().author, self.user)
+
+    def test_batch_follows(self):
+        '''Подписки создаются один раз, на себя — нельзя'''
+        response = self.send('batch_follows', [
+            {'author': 'author'}, {'author': 'author'}, {'author': 'auth'}])
+        statuses = [item['status'] for item in response.json()['results']]
+        self.assertEqual(statuses, ['created', 'exists', 'error'])
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 1)
+
+    def test_batch_follows_concurrent_duplicate(self):
+        '''Подписка, созданная параллельно, отмечается как exists'''
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.user, author=self.author)
+        Recommendation.objects.create(user=self.user, author=other,
+                                      score=1, rank=1)
+        with mock.patch('api.batch._followed', return_value=set()):
+            response = self.send('batch_follows', [
+                {'author': 'author'}, {'author': 'other'}])
+        statuses = [item['status'] for item in response.json()['results']]
+        self.assertEqual(statuses, ['exists', 'created'])
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 2)
+        self.assertFalse(Recommendation.objects.exists())
+
+    @override_settings(API_BATCH_LIMIT=2)
+    def test_batch_limit_and_auth(self):
+        '''Лимит размера пачки и обязательная авторизация'''
+        response = self.send('batch_posts', [{'text': 'a'}] * 3)
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        response = self.send('batch_posts', [{'text': 'a'}], Client())
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        self.assertFalse(Post.objects.filter(text='a').exists())
+
+
+class ApiBatchLockTest(TransactionTestCase):
+
+    @override_settings(SQLITE_LOCK_RETRY_DELAY=0)
+    def test_locked_database_is_retried(self):
+        '''Пачка повторяется целиком, если база занята'''
+        user = User.objects.create_user(username='auth')
+        client = Client()
+        client.force_login(user)
+        create = batch.bulk_create_with_pks
+        calls = []
+
+        def locked_once(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return create(*args, **kwargs)
+
+        with mock.patch('api.batch.bulk_create_with_pks', locked_once):
+            response = client.post(
+                reverse('api:batch_posts'),
+                json.dumps({'items': [{'text': 'Пост'}]}),
+                content_type='application/json')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(Post.objects.filter(text='Пост').count(), 1)
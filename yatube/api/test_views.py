@@ -0,0 +1,94 @@
+import base64
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+TEST_OF_POST: int = 5
+
+
+class ApiReadTest(TestCase):
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='auth')
+        self.author = User.objects.create_user(username='author')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.group = Group.objects.create(title='Тестовая группа',
+                                          slug='test_group')
+        self.posts = [Post.objects.create(text=f'Тестовый текст {i}',
+                                          group=self.group,
+                                          author=self.author)
+                      for i in range(TEST_OF_POST)]
+        Comment.objects.create(post=self.posts[0], author=self.user,
+                               text='Комментарий')
+        Follow.objects.create(user=self.user, author=self.author)
+
+    def test_cursor_pagination_walks_all_posts(self):
+        '''Курсор проходит все посты без повторов'''
+        url = reverse('api:post_list')
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.guest_client.get(url, params).json()
+            seen += [post['id'] for post in data['results']]
+            cursor = data['next']
+            if not cursor:
+                break
+        self.assertEqual(seen, [post.pk for post in reversed(self.posts)])
+
+    def test_sparse_fieldsets(self):
+        '''?fields= возвращает только запрошенные поля'''
+        response = self.guest_client.get(
+            reverse('api:post_detail', kwargs={'post_id': self.posts[0].pk}),
+            {'fields': 'id,author,group'})
+        self.assertEqual(response.json(), {'id': self.posts[0].pk,
+                                           'author': 'author',
+                                           'group': 'test_group'})
+        response = self.guest_client.get(reverse('api:post_list'),
+                                         {'fields': 'id,password'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_etag_not_modified(self):
+        '''Повторный запрос с тем же ETag получает 304'''
+        url = reverse('api:group_list')
+        response = self.guest_client.get(url)
+        response = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_comments_and_follows(self):
+        '''Комментарии поста и подписки текущего пользователя'''
+        comments = self.guest_client.get(reverse(
+            'api:comment_list', kwargs={'post_id': self.posts[0].pk})).json()
+        self.assertEqual(comments['results'][0]['author'], 'auth')
+        follows = self.authorized_client.get(
+            reverse('api:follow_list')).json()
+        self.assertEqual(follows['results'][0]['author'], 'author')
+        response = self.guest_client.get(reverse('api:follow_list'))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_bad_cursor(self):
+        '''Испорченный курсор — ошибка 400'''
+        response = self.guest_client.get(reverse('api:post_list'),
+                                         {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_cursor_with_bad_date(self):
+        '''Нераспознанная или наивная дата в курсоре — тоже 400'''
+        for date in ('notadate', '2020-01-01T00:00:00'):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps([date, 1]).encode()).decode()
+            with self.subTest(date=date):
+                response = self.guest_client.get(reverse('api:post_list'),
+                                                 {'cursor': cursor})
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.BAD_REQUEST)
@@ -0,0 +1,19 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [path('posts/', views.post_list, name='post_list'),
+               path('posts/<int:post_id>/', views.post_detail,
+                    name='post_detail'),
+               path('posts/<int:post_id>/comments/', views.comment_list,
+                    name='comment_list'),
+               path('groups/', views.group_list, name='group_list'),
+               path('follows/', views.follow_list, name='follow_list'),
+               path('batch/posts/', views.batch_posts, name='batch_posts'),
+               path('batch/comments/', views.batch_comments,
+                    name='batch_comments'),
+               path('batch/follows/', views.batch_follows,
+                    name='batch_follows'),
+               ]
@@ -0,0 +1,123 @@
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+
+from core.db import retry_on_lock
+from posts.models import Comment, Follow, Group, Post
+
+from . import batch
+from .resources import (ApiError, Resource, error_response, image_url,
+                        json_response)
+
+POSTS = Resource(
+    fields={'id': 'id',
+            'text': 'text',
+            'pub_date': 'pub_date',
+            'author': 'author__username',
+            'group': 'group__slug',
+            'image': 'image',
+            'views': 'views'},
+    order=(('pub_date', True), ('id', True)),
+    default=('id', 'text', 'pub_date', 'author', 'group', 'image'),
+    converters={'image': image_url})
+GROUPS = Resource(
+    fields={'id': 'id',
+            'title': 'title',
+            'slug': 'slug',
+            'description': 'description'},
+    order=(('id', False),))
+COMMENTS = Resource(
+    fields={'id': 'id',
+            'post': 'post_id',
+            'text': 'text',
+            'pub_date': 'pub_date',
+            'author': 'author__username'},
+    order=(('pub_date', True), ('id', True)))
+FOLLOWS = Resource(
+    fields={'id': 'id',
+            'user': 'user__username',
+            'author': 'author__username'},
+    order=(('id', True),))
+
+
+def api_view(view):
+    '''Только GET и ошибки API в виде JSON'''
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return error_response(str(error), error.status)
+    return wrapper
+
+
+@api_view
+def post_list(request):
+    posts = Post.objects.all()
+    if request.GET.get('group'):
+        posts = posts.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        posts = posts.filter(author__username=request.GET['author'])
+    return json_response(request, POSTS.page(request, posts))
+
+
+@api_view
+def post_detail(request, post_id):
+    post = POSTS.get(request, Post.objects.filter(pk=post_id))
+    if post is None:
+        return error_response('Пост не найден', 404)
+    return json_response(request, post)
+
+
+@api_view
+def comment_list(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return error_response('Пост не найден', 404)
+    comments = Comment.objects.filter(post_id=post_id)
+    return json_response(request, COMMENTS.page(request, comments))
+
+
+@api_view
+def group_list(request):
+    return json_response(request, GROUPS.page(request, Group.objects.all()))
+
+
+@api_view
+def follow_list(request):
+    if not request.user.is_authenticated:
+        return error_response('Требуется авторизация', 401)
+    follows = Follow.objects.filter(user=request.user)
+    return json_response(request, FOLLOWS.page(request, follows))
+
+
+def batch_view(operation):
+    '''POST {"items": [...]} не длиннее API_BATCH_LIMIT'''
+    @require_POST
+    @retry_on_lock
+    def view(request):
+        if not request.user.is_authenticated:
+            return error_response('Требуется авторизация', 401)
+        try:
+            items = json.loads(request.body)['items']
+        except (ValueError, KeyError, TypeError):
+            return error_response('Ожидается JSON вида {"items": [...]}')
+        if not isinstance(items, list):
+            return error_response('items должен быть списком')
+        if len(items) > settings.API_BATCH_LIMIT:
+            return error_response(
+                f'Не больше {settings.API_BATCH_LIMIT} операций за запрос')
+        try:
+            results = operation(request.user, items)
+        except ApiError as error:
+            return error_response(str(error), error.status)
+        return JsonResponse({'results': results})
+    return view
+
+
+batch_posts = batch_view(batch.create_posts)
+batch_comments = batch_view(batch.create_comments)
+batch_follows = batch_view(batch.create_follows)
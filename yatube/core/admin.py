@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from .models import OutgoingEmail
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'subject', 'recipients',
+                    'status', 'attempts', 'next_attempt', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'recipients')
+    exclude = ('message',)
+    readonly_fields = ('last_error',)
+
+
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
@@ -0,0 +1,110 @@
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+_local = threading.local()
+
+
+def bump(model, lookup, **deltas):
+    '''Увеличивает счётчики строки, создавая её при отсутствии'''
+    increments = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**increments)
+
+
+@contextmanager
+def deferred():
+    '''Приращения внутри блока учитываются, только если он завершился.
+
+    retry_on_lock оборачивает так каждую попытку view: откаченная
+    попытка не оставляет событий, и повтор не считает их дважды.
+    '''
+    outer = getattr(_local, 'held', None)
+    held = _local.held = []
+    try:
+        yield
+    finally:
+        _local.held = outer
+    for counter, key, amount in held:
+        counter.incr(key, amount)
+
+
+class BufferedCounter:
+    '''Копит приращения в памяти процесса и сбрасывает их пачкой.
+
+    flush получает Counter {ключ: приращение}. Сбрасывает фоновый поток
+    раз в interval секунд или сразу при накоплении max_keys ключей —
+    в своём соединении и вне транзакций запросов. Поток запускается при
+    первом приращении, если включён COUNTER_FLUSH_THREAD; в тестах
+    сброс вызывается явно.
+    '''
+
+    def __init__(self, flush, interval, max_keys=1000):
+        self._flush = flush
+        self.interval = interval
+        self.max_keys = max_keys
+        self._deltas = Counter()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def incr(self, key, amount=1):
+        held = getattr(_local, 'held', None)
+        if held is not None:
+            held.append((self, key, amount))
+            return
+        with self._lock:
+            self._deltas[key] += amount
+            full = len(self._deltas) >= self.max_keys
+        self.start()
+        if full:
+            self._wake.set()
+
+    def pending(self, key):
+        return self._deltas.get(key, 0)
+
+    def start(self):
+        if self._thread is not None or not settings.COUNTER_FLUSH_THREAD:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='counter-flush', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            finally:
+                connection.close()
+
+    def reset(self):
+        '''Забывает накопленное без записи; для тестов'''
+        with self._lock:
+            self._deltas = Counter()
+
+    def flush(self):
+        with self._lock:
+            deltas, self._deltas = self._deltas, Counter()
+        if not deltas:
+            return
+        try:
+            self._flush(deltas)
+        except Exception:
+            logger.exception('Counter flush failed, keeping deltas')
+            with self._lock:
+                self._deltas.update(deltas)
@@ -0,0 +1,79 @@
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.dispatch import Signal
+
+from .counters import deferred
+
+logger = logging.getLogger(__name__)
+# Один сигнал на пачку bulk_create_with_pks вместо post_save на объект
+post_bulk_create = Signal(providing_args=['instances'])
+
+
+def setup_sqlite(sender, connection, **kwargs):
+    '''Выставляет PRAGMA из SQLITE_PRAGMAS для нового соединения.
+
+    Соединения, повторно выданные пулом, уже настроены.
+    '''
+    if (connection.vendor != 'sqlite'
+            or getattr(connection, 'connection_reused', False)):
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            if name == 'journal_mode' and connection.is_in_memory_db():
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked(error):
+    return 'database is locked' in str(error)
+
+
+def retry_on_lock(view):
+    '''Повторяет пишущий view, если SQLite занята другим писателем.
+
+    Каждая попытка выполняется в своей транзакции, поэтому частично
+    сделанная запись откатывается перед повтором.
+    '''
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if connection.in_atomic_block:
+            return view(request, *args, **kwargs)
+        delay = settings.SQLITE_LOCK_RETRY_DELAY
+        for attempt in range(settings.SQLITE_LOCK_RETRIES):
+            try:
+                with deferred(), transaction.atomic():
+                    return view(request, *args, **kwargs)
+            except OperationalError as error:
+                if (not is_locked(error)
+                        or attempt == settings.SQLITE_LOCK_RETRIES - 1):
+                    raise
+                logger.warning('Database locked in %s, retry %s',
+                               view.__name__, attempt + 1)
+                time.sleep(delay)
+                delay *= 2
+    return wrapper
+
+
+def bulk_create_with_pks(model, objs, send_signals=True):
+    '''bulk_create, после которого у объектов есть pk даже на SQLite.
+
+    SQLite не возвращает id вставленных строк, но внутри одной
+    транзакции они идут подряд, поэтому pk восстанавливаются по
+    последнему id. Вместо post_save на каждый объект рассылается
+    один post_bulk_create на всю пачку, внутри той же транзакции:
+    обработчики обновляют кеши и счётчики разом.
+    '''
+    with transaction.atomic():
+        created = model.objects.bulk_create(objs)
+        if created and created[0].pk is None:
+            last = model._base_manager.order_by('-pk').values_list(
+                'pk', flat=True)[0]
+            for offset, obj in enumerate(reversed(created)):
+                obj.pk = last - offset
+        if send_signals and created:
+            post_bulk_create.send(sender=model, instances=created)
+    return created
@@ -0,0 +1 @@
+'''Бэкенды баз данных с пулом соединений, см. core.db_backends.pool'''
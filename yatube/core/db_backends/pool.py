@@ -0,0 +1,213 @@
+'''Пул соединений с базой данных для Django 2.2.
+
+Бэкенд берёт «сырое» соединение из пула вместо открытия нового и
+возвращает его в пул вместо закрытия. Перед выдачей соединение
+проверяется по возрасту (MAX_AGE) и, при HEALTH_CHECK, запросом
+SELECT 1. Настройки — ключ POOL в описании базы в DATABASES.
+'''
+import os
+import threading
+import time
+
+from django.db import OperationalError
+
+DEFAULTS = {'MAX_SIZE': 10, 'MAX_AGE': 600, 'TIMEOUT': 5.0,
+            'HEALTH_CHECK': True}
+
+
+class PooledConnection:
+    __slots__ = ('raw', 'created', 'checkouts')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created = time.monotonic()
+        self.checkouts = 0
+
+    @property
+    def age(self):
+        return time.monotonic() - self.created
+
+
+class ConnectionPool:
+
+    def __init__(self, max_size, max_age, timeout, health_check):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.timeout = timeout
+        self.health_check = health_check
+        self._idle = []
+        self._in_use = {}
+        self._pending = 0
+        self._condition = threading.Condition()
+        self.metrics = {'checkouts': 0, 'created': 0, 'reused': 0,
+                        'discarded': 0, 'waits': 0, 'wait_time': 0.0,
+                        'max_in_use': 0}
+
+    def _discard(self, pooled):
+        self.metrics['discarded'] += 1
+        try:
+            pooled.raw.close()
+        except Exception:
+            pass
+
+    def _healthy(self, pooled):
+        if self.max_age is not None and pooled.age >= self.max_age:
+            return False
+        if not self.health_check:
+            return True
+        try:
+            cursor = pooled.raw.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+        except Exception:
+            return False
+        return True
+
+    def _reserve(self):
+        '''Берёт свободное соединение или место под новое (под замком)'''
+        started = time.monotonic()
+        if not self._idle and self._busy() >= self.max_size:
+            self.metrics['waits'] += 1
+        while not self._idle and self._busy() >= self.max_size:
+            remaining = self.timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                raise OperationalError(
+                    f'Пул соединений исчерпан ({self.max_size})')
+            self._condition.wait(remaining)
+        self.metrics['wait_time'] += time.monotonic() - started
+        self._pending += 1
+        return self._idle.pop() if self._idle else None
+
+    def _busy(self):
+        return len(self._in_use) + self._pending
+
+    def checkout(self, connect):
+        '''Возвращает (соединение, взято_из_пула)'''
+        with self._condition:
+            self.metrics['checkouts'] += 1
+        while True:
+            with self._condition:
+                pooled = self._reserve()
+            reused = pooled is not None
+            try:
+                if pooled is None:
+                    pooled = PooledConnection(connect())
+                elif not self._healthy(pooled):
+                    with self._condition:
+                        self._discard(pooled)
+                        self._pending -= 1
+                        self._condition.notify()
+                    continue
+            except Exception:
+                with self._condition:
+                    self._pending -= 1
+                    self._condition.notify()
+                raise
+            with self._condition:
+                self._pending -= 1
+                self.metrics['reused' if reused else 'created'] += 1
+                pooled.checkouts += 1
+                self._in_use[id(pooled.raw)] = pooled
+                self.metrics['max_in_use'] = max(self.metrics['max_in_use'],
+                                                 len(self._in_use))
+            return pooled.raw, reused
+
+    def checkin(self, raw):
+        with self._condition:
+            pooled = self._in_use.pop(id(raw), None)
+            if pooled is None:
+                raw.close()
+                return
+            try:
+                raw.rollback()
+            except Exception:
+                self._discard(pooled)
+            else:
+                if self.max_age is not None and pooled.age >= self.max_age:
+                    self._discard(pooled)
+                else:
+                    self._idle.append(pooled)
+            self._condition.notify()
+
+    def discard(self, raw):
+        with self._condition:
+            pooled = self._in_use.pop(id(raw), None)
+            if pooled is not None:
+                self._discard(pooled)
+            self._condition.notify()
+
+    def close_all(self):
+        with self._condition:
+            for pooled in self._idle:
+                self._discard(pooled)
+            self._idle = []
+
+    def stats(self):
+        with self._condition:
+            ages = [pooled.age for pooled in
+                    list(self._idle) + list(self._in_use.values())]
+            return dict(self.metrics,
+                        size=len(ages),
+                        idle=len(self._idle),
+                        in_use=len(self._in_use),
+                        max_size=self.max_size,
+                        oldest_age=max(ages, default=0.0),
+                        average_age=sum(ages) / len(ages) if ages else 0.0)
+
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict):
+    with _lock:
+        if alias not in _pools:
+            options = dict(DEFAULTS, **settings_dict.get('POOL', {}))
+            _pools[alias] = ConnectionPool(options['MAX_SIZE'],
+                                           options['MAX_AGE'],
+                                           options['TIMEOUT'],
+                                           options['HEALTH_CHECK'])
+        return _pools[alias]
+
+
+def pool_stats():
+    '''Метрики всех пулов процесса: {alias: {...}}'''
+    return {alias: pool.stats() for alias, pool in _pools.items()}
+
+
+def _reset_after_fork():
+    # Соединения родителя нельзя использовать в дочернем процессе
+    _pools.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class PooledDatabaseWrapperMixin:
+    '''Примесь к DatabaseWrapper: соединения берутся из пула'''
+
+    connection_reused = False
+
+    def pool_enabled(self):
+        return 'POOL' in self.settings_dict
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_enabled():
+            self.connection_reused = False
+            return super().get_new_connection(conn_params)
+        pool = get_pool(self.alias, self.settings_dict)
+        raw, self.connection_reused = pool.checkout(
+            lambda: super(PooledDatabaseWrapperMixin,
+                          self).get_new_connection(conn_params))
+        return raw
+
+    def _close(self):
+        if self.connection is None or not self.pool_enabled():
+            return super()._close()
+        pool = get_pool(self.alias, self.settings_dict)
+        with self.wrap_database_errors:
+            if self.errors_occurred and not self.is_usable():
+                pool.discard(self.connection)
+            else:
+                pool.checkin(self.connection)
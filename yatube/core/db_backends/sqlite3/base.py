@@ -0,0 +1,10 @@
+from django.db.backends.sqlite3 import base
+
+from ..pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+
+    def pool_enabled(self):
+        # Закрытие in-memory базы уничтожает данные, её не пулим
+        return super().pool_enabled() and not self.is_in_memory_db()
@@ -0,0 +1,170 @@
+'''Нормализация картинок при загрузке.
+
+Картинка поворачивается по EXIF, теряет метаданные, уменьшается до
+IMAGE_MAX_SIDE и пережимается в том же формате. JPEG декодируется
+через draft() сразу в уменьшенном масштабе, поэтому огромные снимки
+с камеры не разворачиваются в память целиком. Работа идёт в пуле
+процессов, чтобы декодирование не занимало процесс, отвечающий на
+запросы.
+'''
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .uploads import StreamedImageFile, upload_dir
+
+JPEG_MODES = ('RGB', 'L', 'CMYK')
+
+_executor = None
+
+
+def options():
+    return {'max_side': settings.IMAGE_MAX_SIDE,
+            'quality': settings.IMAGE_QUALITY}
+
+
+def normalize_file(source, target, max_side, quality):
+    '''Пишет нормализованную копию source в target.
+
+    Возвращает размеры результата или None, если картинку лучше не
+    трогать (анимация).
+    '''
+    with Image.open(source) as image:
+        if getattr(image, 'is_animated', False):
+            return None
+        image_format = image.format
+        icc_profile = image.info.get('icc_profile')
+        if image_format == 'JPEG':
+            image.draft('RGB', (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        params = {'optimize': True}
+        if icc_profile:
+            params['icc_profile'] = icc_profile
+        if image_format == 'JPEG':
+            if image.mode not in JPEG_MODES:
+                image = image.convert('RGB')
+            params.update(quality=quality, progressive=True)
+        elif image_format == 'WEBP':
+            params['quality'] = quality
+        image.save(target, image_format, **params)
+        return image.size
+
+
+def is_normalized(path, max_side):
+    '''Картинка уже не больше max_side и без EXIF: трогать незачем.
+
+    Читается только заголовок файла.
+    '''
+    with Image.open(path) as image:
+        return max(image.size) <= max_side and not image.getexif()
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        # spawn: fork процесса с потоками и открытыми соединениями опасен
+        _executor = ProcessPoolExecutor(
+            settings.IMAGE_NORMALIZE_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'))
+    return _executor
+
+
+def run(source, target):
+    '''Нормализует в пуле процессов или на месте, если пул отключён'''
+    if not settings.IMAGE_NORMALIZE_WORKERS:
+        return normalize_file(source, target, **options())
+    return _pool().submit(normalize_file, source, target,
+                          **options()).result()
+
+
+def original_name(name):
+    return os.path.join('originals', name)
+
+
+def _discard(result):
+    result.close()
+    try:
+        os.remove(result.temporary_file_path())
+    except FileNotFoundError:
+        pass
+
+
+def _original_attr(field_file):
+    # На экземпляре модели: FieldFile после сохранения создаётся заново
+    return f'_{field_file.field.name}_original'
+
+
+def _forget_original(field_file):
+    path = getattr(field_file.instance, _original_attr(field_file), None)
+    if path is not None:
+        delattr(field_file.instance, _original_attr(field_file))
+        os.remove(path)
+
+
+def keep_original(field_file):
+    '''Сохраняет оригинал под originals/<окончательное имя картинки>'''
+    path = getattr(field_file.instance, _original_attr(field_file), None)
+    if path is None:
+        return
+    name = original_name(field_file.name)
+    # Имя картинки уникально, значит файл с таким именем — чужой остаток
+    default_storage.delete(name)
+    with open(path, 'rb') as original:
+        default_storage.save(name, File(original))
+    _forget_original(field_file)
+
+
+def normalize_upload(field_file):
+    '''Подменяет ещё не сохранённый файл поля нормализованной копией'''
+    upload = field_file.file
+    name = os.path.basename(upload.name or field_file.name)
+    directory = upload_dir()
+    os.makedirs(directory, exist_ok=True)
+    if settings.IMAGE_KEEP_ORIGINALS:
+        # Имя оригинала строится от окончательного имени картинки, а оно
+        # известно только после сохранения, см. keep_original
+        upload.seek(0)
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.original',
+                                         delete=False) as original:
+            shutil.copyfileobj(upload, original)
+        setattr(field_file.instance, _original_attr(field_file),
+                original.name)
+    source = None
+    if hasattr(upload, 'temporary_file_path'):
+        path = upload.temporary_file_path()
+    else:
+        upload.seek(0)
+        source = tempfile.NamedTemporaryFile(dir=directory)
+        shutil.copyfileobj(upload, source)
+        source.flush()
+        path = source.name
+    # Файл не удаляется при закрытии: хранилище переносит его в MEDIA_ROOT.
+    # Если сохранение модели упадёт, копию уберёт gc_media
+    result = StreamedImageFile(name, getattr(upload, 'content_type', None),
+                               None, None, delete=False)
+    try:
+        size = run(path, result.temporary_file_path())
+    except OSError:
+        size = None
+    except BaseException:
+        _discard(result)
+        _forget_original(field_file)
+        raise
+    finally:
+        if source is not None:
+            source.close()
+    if size is None:
+        _discard(result)
+        upload.seek(0)
+        return False
+    result.size = os.path.getsize(result.temporary_file_path())
+    field_file.file = result
+    return True
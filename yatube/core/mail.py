@@ -0,0 +1,166 @@
+'''Очередь исходящих писем.
+
+Письмо хранится в базе как JSON с темой, текстом, адресами и
+заголовками, а воркер собирает из него EmailMessage заново. Перед
+отправкой строка забирается условным UPDATE в статус «отправляется»,
+поэтому два воркера не отправят одно письмо дважды. Если воркер упал,
+письмо снова берётся после MAIL_QUEUE_CLAIM_TIMEOUT.
+'''
+import base64
+import json
+import logging
+from datetime import timedelta
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def _dump_attachment(attachment):
+    if isinstance(attachment, MIMEBase):
+        raise ValueError('MIME-вложения нельзя поставить в очередь')
+    filename, content, mimetype = attachment
+    if isinstance(content, bytes):
+        return [filename, base64.b64encode(content).decode(), mimetype, True]
+    return [filename, content, mimetype, False]
+
+
+def dump_message(message):
+    '''JSON с полями письма для хранения в очереди'''
+    return json.dumps({
+        'subject': str(message.subject),
+        'body': str(message.body),
+        'from_email': str(message.from_email),
+        'to': [str(address) for address in message.to],
+        'cc': [str(address) for address in message.cc],
+        'bcc': [str(address) for address in message.bcc],
+        'reply_to': [str(address) for address in message.reply_to],
+        'headers': {str(name): str(value)
+                    for name, value in message.extra_headers.items()},
+        'content_subtype': message.content_subtype,
+        'alternatives': [[str(content), mimetype] for content, mimetype
+                         in getattr(message, 'alternatives', ())],
+        'attachments': [_dump_attachment(attachment)
+                        for attachment in message.attachments],
+    }, ensure_ascii=False)
+
+
+def load_message(payload):
+    '''Собирает письмо из JSON, записанного dump_message'''
+    data = json.loads(payload)
+    content_subtype = data.pop('content_subtype')
+    data['alternatives'] = [tuple(alternative)
+                            for alternative in data['alternatives']]
+    data['attachments'] = [
+        (filename, base64.b64decode(content) if encoded else content,
+         mimetype)
+        for filename, content, mimetype, encoded in data['attachments']]
+    message = EmailMultiAlternatives(**data)
+    message.content_subtype = content_subtype
+    return message
+
+
+def enqueue(email_messages):
+    '''Кладёт письма в очередь вместо отправки внутри запроса'''
+    outgoing = []
+    for message in email_messages:
+        if not message.recipients():
+            continue
+        outgoing.append(OutgoingEmail(
+            subject=str(message.subject)[:255],
+            recipients=', '.join(message.recipients()),
+            message=dump_message(message)))
+    OutgoingEmail.objects.bulk_create(outgoing)
+    return len(outgoing)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    '''EMAIL_BACKEND, который только ставит письма в очередь.
+
+    Реальную отправку выполняет команда send_queued_mail через
+    бэкенд из MAIL_QUEUE_BACKEND.
+    '''
+
+    def send_messages(self, email_messages):
+        try:
+            return enqueue(email_messages)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+
+
+def _retry_at(attempts):
+    delay = settings.MAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1)
+    return timezone.now() + timedelta(seconds=delay)
+
+
+def _fail(outgoing, error):
+    outgoing.attempts += 1
+    outgoing.last_error = str(error)
+    if outgoing.attempts >= settings.MAIL_QUEUE_MAX_ATTEMPTS:
+        outgoing.status = OutgoingEmail.FAILED
+    else:
+        outgoing.status = OutgoingEmail.QUEUED
+        outgoing.next_attempt = _retry_at(outgoing.attempts)
+    outgoing.save(update_fields=('attempts', 'last_error',
+                                 'status', 'next_attempt'))
+
+
+def _claim(outgoing):
+    '''Забирает письмо себе; False — его уже взял другой воркер'''
+    lease = timezone.now() + timedelta(
+        seconds=settings.MAIL_QUEUE_CLAIM_TIMEOUT)
+    claimed = OutgoingEmail.objects.filter(
+        pk=outgoing.pk, status=outgoing.status,
+        next_attempt=outgoing.next_attempt,
+    ).update(status=OutgoingEmail.SENDING, next_attempt=lease)
+    outgoing.status, outgoing.next_attempt = OutgoingEmail.SENDING, lease
+    return bool(claimed)
+
+
+def send_queued(batch_size=None):
+    '''Отправляет пачку писем через одно соединение.
+
+    Возвращает пару (отправлено, с ошибкой).
+    '''
+    batch_size = batch_size or settings.MAIL_QUEUE_BATCH_SIZE
+    due = OutgoingEmail.objects.filter(
+        status__in=(OutgoingEmail.QUEUED, OutgoingEmail.SENDING),
+        next_attempt__lte=timezone.now())
+    batch = [outgoing for outgoing in due[:batch_size] if _claim(outgoing)]
+    if not batch:
+        return 0, 0
+    connection = get_connection(settings.MAIL_QUEUE_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        logger.warning('Mail queue: connection failed: %s', error)
+        for outgoing in batch:
+            _fail(outgoing, error)
+        return 0, len(batch)
+    sent, failed = [], 0
+    try:
+        for outgoing in batch:
+            try:
+                message = load_message(outgoing.message)
+                message.connection = connection
+                connection.send_messages([message])
+            except Exception as error:
+                logger.warning('Mail queue: message %s failed: %s',
+                               outgoing.pk, error)
+                _fail(outgoing, error)
+                failed += 1
+            else:
+                sent.append(outgoing.pk)
+    finally:
+        connection.close()
+    OutgoingEmail.objects.filter(pk__in=sent).update(
+        status=OutgoingEmail.SENT, sent_at=timezone.now(), last_error='')
+    return len(sent), failed
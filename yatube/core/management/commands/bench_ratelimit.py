@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.urls import resolve, reverse
+
+from core.ratelimit import RateLimitMiddleware
+
+
+class Command(BaseCommand):
+    help = 'Измеряет накладные расходы RateLimitMiddleware на запрос'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        path = reverse('posts:add_comment', kwargs={'post_id': 1})
+        request = RequestFactory().post(path)
+        request.user = AnonymousUser()
+        request.resolver_match = resolve(path)
+        middleware = RateLimitMiddleware(lambda request: None)
+        # Лимит заведомо не достигается: меряем только проверку
+        rules = {'posts:add_comment': {'rate': f'{options["requests"]}/d'}}
+        with override_settings(RATELIMIT_ENABLED=True, RATELIMITS=rules):
+            started = time.perf_counter()
+            for number in range(options['requests']):
+                request.META['REMOTE_ADDR'] = f'10.0.{number % 256}.1'
+                middleware.process_view(request, None, (), {})
+            elapsed = time.perf_counter() - started
+        per_request = elapsed / options['requests'] * 10 ** 6
+        self.stdout.write(f'Кеш {settings.RATELIMIT_CACHE}: '
+                          f'{per_request:.1f} мкс на запрос')
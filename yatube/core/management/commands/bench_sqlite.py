@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+DEFAULT_PRAGMAS = {'busy_timeout': 5000}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает конкурентную запись и чтение SQLite с настройками '
+            'по умолчанию и с SQLITE_PRAGMAS')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=3.0)
+
+    def handle(self, *args, **options):
+        profiles = {'default': DEFAULT_PRAGMAS,
+                    'tuned': settings.SQLITE_PRAGMAS}
+        self.stdout.write(f'{"профиль":<10}{"записей/с":>12}'
+                          f'{"чтений/с":>12}{"locked":>10}')
+        for name, pragmas in profiles.items():
+            writes, reads, locked = self.run(pragmas, options)
+            seconds = options['seconds']
+            self.stdout.write(f'{name:<10}{writes / seconds:>12.0f}'
+                              f'{reads / seconds:>12.0f}{locked:>10}')
+
+    def connect(self, path, pragmas):
+        db = sqlite3.connect(path, timeout=0, isolation_level=None,
+                             check_same_thread=False)
+        for name, value in pragmas.items():
+            db.execute(f'PRAGMA {name} = {value}')
+        return db
+
+    def run(self, pragmas, options):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'bench.sqlite3')
+        setup = self.connect(path, pragmas)
+        setup.execute('CREATE TABLE comment '
+                      '(id INTEGER PRIMARY KEY, post_id INT, text TEXT)')
+        setup.execute('CREATE INDEX comment_post ON comment (post_id)')
+        stats = {'writes': 0, 'reads': 0, 'locked': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['seconds']
+
+        def work(write):
+            db = self.connect(path, pragmas)
+            done = failed = 0
+            while time.monotonic() < deadline:
+                try:
+                    if write:
+                        db.execute('INSERT INTO comment (post_id, text) '
+                                   'VALUES (?, ?)', (done % 100, 'x' * 200))
+                    else:
+                        db.execute('SELECT count(*) FROM comment '
+                                   'WHERE post_id = ?',
+                                   (done % 100,)).fetchone()
+                    done += 1
+                except sqlite3.OperationalError:
+                    failed += 1
+            db.close()
+            with lock:
+                stats['writes' if write else 'reads'] += done
+                stats['locked'] += failed
+
+        threads = ([threading.Thread(target=work, args=(True,))
+                    for _ in range(options['writers'])]
+                   + [threading.Thread(target=work, args=(False,))
+                      for _ in range(options['readers'])])
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        setup.close()
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+        return stats['writes'], stats['reads'], stats['locked']
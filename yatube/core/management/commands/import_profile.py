@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+Import = namedtuple('Import', 'name self_us cumulative_us')
+
+# Выполняется в отдельном процессе: холодный старт как у воркера
+CHILD = '''
+import json, resource, time
+started = time.perf_counter()
+from yatube.wsgi import application
+elapsed = time.perf_counter() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'seconds': elapsed, 'rss_kb': rss}))
+'''
+
+
+def parse_importtime(stderr):
+    '''Строки вида «import time: self | cumulative | name»'''
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append(Import(name.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+class Command(BaseCommand):
+    help = ('Профиль импорта при старте воркера по профилям окружения '
+            '(python -X importtime)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--env', action='append',
+                            choices=settings.ENV_PROFILES,
+                            help='Профиль; можно указать несколько')
+        parser.add_argument('--top', type=int, default=15,
+                            help='Сколько самых дорогих пакетов показать')
+
+    def measure(self, env):
+        # Настоящие ключ, адрес и кеш для замера импорта не нужны, а
+        # prod без них не запускается
+        environ = {'YATUBE_SECRET_KEY': 'import-profile',
+                   'YATUBE_SITE_URL': 'http://localhost',
+                   'YATUBE_SHARED_CACHE': '127.0.0.1:11211', **os.environ,
+                   'YATUBE_ENV': env,
+                   'DJANGO_SETTINGS_MODULE': 'yatube.settings'}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD],
+            cwd=settings.BASE_DIR, env=environ, capture_output=True,
+            text=True)
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        return json.loads(result.stdout), parse_importtime(result.stderr)
+
+    def handle(self, *args, **options):
+        for env in options['env'] or ['dev', 'prod']:
+            summary, imports = self.measure(env)
+            self.stdout.write(
+                f'[{env}] старт {summary["seconds"] * 1000:.0f} мс, '
+                f'модулей {len(imports)}, '
+                f'память {summary["rss_kb"] / 1024:.1f} МБ')
+            # Верхний уровень: пакеты, импортированные не из других пакетов
+            roots = {}
+            for item in imports:
+                root = item.name.split('.')[0]
+                if item.name == root:
+                    roots[root] = max(roots.get(root, 0),
+                                      item.cumulative_us)
+            for name, cumulative_us in sorted(
+                    roots.items(), key=lambda pair: -pair[1])[:options['top']]:
+                self.stdout.write(f'  {cumulative_us / 1000:8.1f} мс  {name}')
@@ -0,0 +1,54 @@
+import glob
+import io
+import os
+import pstats
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import make_token, view_dir
+
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+
+
+class Command(BaseCommand):
+    help = 'Сводит сохранённые профили запросов в отчёт по функциям'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', help='Имя view, например posts:index')
+        parser.add_argument('--hours', type=float,
+                            help='Только профили за последние N часов')
+        parser.add_argument('--sort', choices=SORT_KEYS,
+                            default='cumulative')
+        parser.add_argument('--limit', type=int, default=30)
+        parser.add_argument('--token', action='store_true',
+                            help='Выдать значение заголовка X-Profile')
+
+    def files(self, view, hours):
+        if view:
+            pattern = os.path.join(view_dir(view), '*.prof')
+        else:
+            pattern = os.path.join(settings.PROFILING_DIR, '*', '*.prof')
+        files = glob.glob(pattern)
+        if hours is not None:
+            since = time.time() - hours * 60 * 60
+            files = [path for path in files
+                     if os.path.getmtime(path) >= since]
+        return sorted(files)
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(make_token())
+            return
+        files = self.files(options['view'], options['hours'])
+        if not files:
+            raise CommandError('Профилей не найдено')
+        views = {os.path.basename(os.path.dirname(path)) for path in files}
+        self.stdout.write(f'Профилей: {len(files)}, '
+                          f'view: {", ".join(sorted(views))}')
+        report = io.StringIO()
+        stats = pstats.Stats(*files, stream=report)
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(
+            options['limit'])
+        self.stdout.write(report.getvalue())
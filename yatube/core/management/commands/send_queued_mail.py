@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.mail import send_queued
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.MAIL_QUEUE_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true',
+                            help='Работать постоянно')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Пауза между пачками, сек.')
+
+    def handle(self, *args, **options):
+        while True:
+            while True:
+                sent, failed = send_queued(options['batch_size'])
+                if sent or failed:
+                    self.stdout.write(f'Отправлено: {sent}, '
+                                      f'с ошибкой: {failed}')
+                if sent + failed < options['batch_size']:
+                    break
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
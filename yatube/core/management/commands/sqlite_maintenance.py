@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = 'Сбрасывает WAL в основной файл и обновляет статистику SQLite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vacuum', action='store_true',
+                            help='Дополнительно выполнить VACUUM')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда нужна только для SQLite')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            busy, log, checkpointed = cursor.fetchone()
+            self.stdout.write(f'Checkpoint: busy={busy}, '
+                              f'страниц в WAL={log}, '
+                              f'перенесено={checkpointed}')
+            cursor.execute('PRAGMA optimize')
+            if options['vacuum']:
+                cursor.execute('VACUUM')
+        self.stdout.write('Готово')
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-19 16:04
+
+from django.db import migrations, models
+
+
+def fail_pickled(apps, schema_editor):
+    # Старые письма хранились pickle, а распаковывать его из базы нельзя
+    OutgoingEmail = apps.get_model('core', 'OutgoingEmail')
+    OutgoingEmail.objects.exclude(status='sent').update(
+        status='failed', last_error='Письмо в устаревшем формате')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_pickled, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='outgoingemail',
+            name='message',
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='message',
+            field=models.TextField(default='', verbose_name='Сообщение'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='outgoingemail',
+            name='status',
+            field=models.CharField(choices=[('queued', 'В очереди'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('failed', 'Ошибка')], default='queued', max_length=10, verbose_name='Статус'),
+        ),
+    ]
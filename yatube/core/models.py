@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -7,3 +8,40 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class OutgoingEmail(models.Model):
+    '''Письмо в очереди на отправку'''
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = ((QUEUED, 'В очереди'),
+                      (SENDING, 'Отправляется'),
+                      (SENT, 'Отправлено'),
+                      (FAILED, 'Ошибка'))
+
+    subject = models.CharField('Тема', max_length=255, blank=True)
+    recipients = models.TextField('Получатели')
+    # JSON с полями письма, см. core.mail.dump_message
+    message = models.TextField('Сообщение')
+    status = models.CharField('Статус',
+                              max_length=10,
+                              choices=STATUS_CHOICES,
+                              default=QUEUED)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    next_attempt = models.DateTimeField('Следующая попытка',
+                                        default=timezone.now)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', blank=True, null=True)
+
+    def __str__(self):
+        return f'{self.subject} -> {self.recipients}'
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('next_attempt',)
+        indexes = [models.Index(fields=['status', 'next_attempt'],
+                                name='outbox_due_idx')]
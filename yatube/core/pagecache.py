@@ -0,0 +1,135 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+KEY_PREFIX = 'pagecache:'
+TAG_PREFIX = 'pagecache-tag:'
+
+
+def _cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def _tags():
+    # Версии тегов общие для процессов: сброс виден всем воркерам и
+    # командам, даже если сами страницы лежат в кеше процесса
+    return caches[settings.PAGE_CACHE_TAG_ALIAS]
+
+
+def tag_response(response, *tags, on_hit=None):
+    '''Разрешает кешировать ответ и помечает его тегами инвалидации.
+
+    on_hit — пара (путь к функции, аргументы), которая вызывается при
+    каждой отдаче страницы из кеша, например для счётчика просмотров.
+    '''
+    response.page_cache_tags = tags
+    response.page_cache_on_hit = on_hit
+    return response
+
+
+def invalidate(*tags):
+    '''Сбрасывает все страницы, помеченные любым из тегов'''
+    if tags:
+        version = time.time()
+        _tags().set_many({TAG_PREFIX + tag: version for tag in tags},
+                         None)
+
+
+def _tag_versions(tags, since):
+    '''Версии тегов; None, если тег сбросили во время рендера'''
+    cache = _tags()
+    keys = [TAG_PREFIX + tag for tag in tags]
+    versions = cache.get_many(keys)
+    if any(version >= since for version in versions.values()):
+        return None
+    missing = {key: time.time() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return {key[len(TAG_PREFIX):]: version
+            for key, version in versions.items()}
+
+
+def _is_valid(entry):
+    keys = [TAG_PREFIX + tag for tag in entry['tags']]
+    versions = _tags().get_many(keys)
+    return all(versions.get(TAG_PREFIX + tag) == version
+               for tag, version in entry['tags'].items())
+
+
+def _is_cacheable(response):
+    return (response.status_code == 200
+            and getattr(response, 'page_cache_tags', None)
+            and not response.streaming
+            and not response.cookies
+            and 'private' not in response.get('Cache-Control', ''))
+
+
+def _build(entry, state):
+    if entry.get('on_hit'):
+        path, args = entry['on_hit']
+        import_string(path)(*args)
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for header, value in entry['headers']:
+        response[header] = value
+    response['X-Page-Cache'] = state
+    return response
+
+
+class AnonymousPageCacheMiddleware:
+    '''Кеш целых страниц для анонимных посетителей.
+
+    Стоит перед SessionMiddleware: запрос без cookie сессии отдаётся
+    из кеша без загрузки сессии и пользователя. Устаревшая запись
+    ещё PAGE_CACHE_STALE секунд отдаётся остальным посетителям, пока
+    один запрос обновляет её.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self._applies(request):
+            return self.get_response(request)
+        cache = _cache()
+        key = KEY_PREFIX + hashlib.md5(
+            request.get_full_path().encode()).hexdigest()
+        entry = cache.get(key)
+        refreshing = False
+        if entry is not None and _is_valid(entry):
+            age = time.time() - entry['created']
+            if age < settings.PAGE_CACHE_TIMEOUT:
+                return _build(entry, 'HIT')
+            refreshing = cache.add(key + ':lock', 1,
+                                   settings.PAGE_CACHE_TIMEOUT)
+            if not refreshing:
+                return _build(entry, 'STALE')
+        started = time.time()
+        response = self.get_response(request)
+        tags = (_tag_versions(response.page_cache_tags, started)
+                if _is_cacheable(response) else None)
+        if tags is not None:
+            entry = {'content': response.content,
+                     'status': response.status_code,
+                     'headers': list(response.items()),
+                     'tags': tags,
+                     'on_hit': response.page_cache_on_hit,
+                     'created': started}
+            cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT
+                      + settings.PAGE_CACHE_STALE)
+            response['X-Page-Cache'] = 'MISS'
+        if refreshing:
+            cache.delete(key + ':lock')
+        return response
+
+    @staticmethod
+    def _applies(request):
+        return (settings.PAGE_CACHE_ENABLED
+                and request.method in ('GET', 'HEAD')
+                and settings.SESSION_COOKIE_NAME not in request.COOKIES
+                and CookieStorage.cookie_name not in request.COOKIES)
@@ -0,0 +1,112 @@
+'''Выборочное профилирование запросов в проде.
+
+ProfilingMiddleware снимает cProfile с доли запросов
+PROFILING_SAMPLE_RATE и с любого запроса, пришедшего с подписанным
+заголовком X-Profile (значение выдаёт profile_report --token).
+Профиль пишется в PROFILING_DIR/<имя view>/, команда profile_report
+сводит их в отчёт по самым тяжёлым функциям. Ответы из кеша страниц
+view не вызывают, поэтому их профили лежат отдельно, в
+pagecache.<имя view>/. В каждом каталоге хранится не больше
+PROFILING_MAX_FILES последних профилей.
+'''
+import cProfile
+import logging
+import os
+import random
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+SALT = 'core.profiling'
+TOKEN_VALUE = 'profile'
+
+
+def make_token():
+    '''Значение заголовка X-Profile, действует PROFILING_TOKEN_MAX_AGE'''
+    return signing.TimestampSigner(salt=SALT).sign(TOKEN_VALUE)
+
+
+def valid_token(token):
+    try:
+        value = signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return value == TOKEN_VALUE
+
+
+def view_dir(view_name):
+    return os.path.join(settings.PROFILING_DIR,
+                        (view_name or 'unresolved').replace(':', '.'))
+
+
+def profile_name(request, response):
+    '''Имя каталога профиля: view запроса или pagecache:<view>'''
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+    if response.get('X-Page-Cache') in ('HIT', 'STALE'):
+        return f'pagecache:{match.view_name}'
+    return match.view_name
+
+
+class ProfilingMiddleware:
+    '''Снимает профиль с выбранных запросов; ставится первым'''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def sampled(self, request):
+        token = request.META.get('HTTP_X_PROFILE')
+        if token is not None:
+            return valid_token(token)
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, request):
+        if not self.sampled(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # В потоке уже работает другой профилировщик
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        name = self.save(profiler, profile_name(request, response))
+        if name and 'HTTP_X_PROFILE' in request.META:
+            response['X-Profile-Id'] = name
+        return response
+
+    def save(self, profiler, view_name):
+        directory = view_dir(view_name)
+        name = f'{time.time():.6f}-{os.getpid()}.prof'
+        try:
+            os.makedirs(directory, exist_ok=True)
+            profiler.dump_stats(os.path.join(directory, name))
+            self.rotate(directory)
+        except OSError as error:
+            logger.warning('Cannot save profile: %s', error)
+            return None
+        return name
+
+    @staticmethod
+    def rotate(directory):
+        '''Удаляет самые старые профили сверх PROFILING_MAX_FILES'''
+        # Имена начинаются со времени, поэтому сортировка по имени
+        # совпадает с сортировкой по возрасту
+        names = sorted(os.listdir(directory))
+        for name in names[:-settings.PROFILING_MAX_FILES]:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                continue
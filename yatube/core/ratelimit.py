@@ -0,0 +1,91 @@
+'''Ограничение частоты запросов к пишущим view.
+
+Лимит задаётся по имени view в RATELIMITS строкой «N/период»:
+не больше N запросов за период с равномерным восстановлением,
+как у token bucket. Ведро считается по двум соседним окнам счётчиков
+в общем для процессов кеше RATELIMIT_CACHE: cache.incr в memcached
+атомарен, поэтому параллельные воркеры не теряют запросы и делят один
+лимит, а на проверку уходит два обращения к кешу. Отдельные
+вёдра заводятся на пользователя и на IP.
+'''
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+KEY_PREFIX = 'ratelimit:'
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+DEFAULT_METHODS = ('POST',)
+
+
+def parse_rate(rate):
+    '''«10/m» -> (10, 60)'''
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def hit(key, limit, period, now=None):
+    '''Учитывает запрос; возвращает 0 или через сколько секунд повторить'''
+    cache = caches[settings.RATELIMIT_CACHE]
+    now = time.time() if now is None else now
+    window = int(now // period)
+    current = f'{KEY_PREFIX}{key}:{window}'
+    cache.add(current, 0, period * 2)
+    try:
+        count = cache.incr(current)
+    except ValueError:
+        # Ключ успел истечь между add и incr
+        cache.set(current, 1, period * 2)
+        count = 1
+    previous = cache.get(f'{KEY_PREFIX}{key}:{window - 1}', 0)
+    elapsed = now / period - window
+    if previous * (1 - elapsed) + count <= limit:
+        return 0
+    if count >= limit or not previous:
+        wait = 1 - elapsed
+    else:
+        # Доля прошлого окна, которая должна «вытечь»
+        wait = 1 - (limit - count) / previous - elapsed
+    return max(1, math.ceil(wait * period))
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse('Слишком много запросов, попробуйте позже',
+                            content_type='text/plain; charset=utf-8',
+                            status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+class RateLimitMiddleware:
+    '''Возвращает 429 с Retry-After, если превышен лимит view'''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.RATELIMIT_ENABLED:
+            return None
+        name = request.resolver_match.view_name
+        rule = settings.RATELIMITS.get(name)
+        if rule is None or request.method not in rule.get(
+                'methods', DEFAULT_METHODS):
+            return None
+        limit, period = parse_rate(rule['rate'])
+        keys = [f'{name}:ip:{client_ip(request)}']
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            keys.append(f'{name}:user:{user.pk}')
+        retry_after = max(hit(key, limit, period) for key in keys)
+        if retry_after:
+            return too_many_requests(retry_after)
+        return None
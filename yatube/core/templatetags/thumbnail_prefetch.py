@@ -0,0 +1,16 @@
+from django import template
+
+from core.thumbnails import prefetch
+
+register = template.Library()
+
+
+@register.simple_tag
+def prefetch_thumbnails(objects, geometry, field='image', **options):
+    '''Разом загружает метаданные миниатюр для объектов страницы.
+
+    Параметры те же, что у последующих {% thumbnail %}, иначе ключи
+    не совпадут.
+    '''
+    prefetch([getattr(obj, field) for obj in objects], geometry, **options)
+    return ''
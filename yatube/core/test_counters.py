@@ -0,0 +1,80 @@
+import threading
+from collections import Counter
+
+from django.db import OperationalError
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from .counters import BufferedCounter, deferred
+from .db import retry_on_lock
+
+
+class Recorder:
+
+    def __init__(self):
+        self.flushed = Counter()
+        self.done = threading.Event()
+
+    def __call__(self, deltas):
+        self.flushed.update(deltas)
+        self.done.set()
+
+
+class BufferedCounterTests(SimpleTestCase):
+
+    def test_incr_does_not_flush_in_caller(self):
+        '''Приращение в запросе никогда не пишет в базу само'''
+        recorder = Recorder()
+        counter = BufferedCounter(recorder, interval=0, max_keys=1)
+        counter.incr('a')
+        self.assertEqual(recorder.flushed, Counter())
+        self.assertEqual(counter.pending('a'), 1)
+        counter.flush()
+        self.assertEqual(recorder.flushed, Counter({'a': 1}))
+
+    def test_reset_drops_deltas(self):
+        recorder = Recorder()
+        counter = BufferedCounter(recorder, interval=60)
+        counter.incr('a')
+        counter.reset()
+        counter.flush()
+        self.assertEqual(recorder.flushed, Counter())
+
+    @override_settings(COUNTER_FLUSH_THREAD=True)
+    def test_thread_flushes_when_full(self):
+        recorder = Recorder()
+        counter = BufferedCounter(recorder, interval=60, max_keys=2)
+        counter.incr('a')
+        counter.incr('b')
+        self.assertTrue(recorder.done.wait(5))
+        self.assertEqual(recorder.flushed, Counter({'a': 1, 'b': 1}))
+
+    def test_deferred_discards_failed_block(self):
+        '''Приращения из упавшего блока не учитываются'''
+        counter = BufferedCounter(Recorder(), interval=60)
+        with self.assertRaises(ValueError):
+            with deferred():
+                counter.incr('a')
+                raise ValueError
+        with deferred():
+            counter.incr('a')
+            self.assertEqual(counter.pending('a'), 0)
+        self.assertEqual(counter.pending('a'), 1)
+
+
+class RetryCountingTests(TransactionTestCase):
+
+    @override_settings(SQLITE_LOCK_RETRY_DELAY=0)
+    def test_retried_view_counts_once(self):
+        counter = BufferedCounter(Recorder(), interval=60)
+        calls = []
+
+        @retry_on_lock
+        def view(request):
+            counter.incr('event')
+            calls.append(request)
+            if len(calls) < 2:
+                raise OperationalError('database is locked')
+            return 'ok'
+
+        self.assertEqual(view('request'), 'ok')
+        self.assertEqual(counter.pending('event'), 1)
@@ -0,0 +1,53 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase, override_settings
+
+from .db import retry_on_lock
+
+
+class SqliteTuningTests(TransactionTestCase):
+
+    def test_pragmas_applied(self):
+        '''Новое соединение получает PRAGMA из настроек'''
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    @override_settings(SQLITE_LOCK_RETRY_DELAY=0)
+    def test_retry_on_lock(self):
+        '''Занятая база приводит к повтору, а не к ошибке'''
+        calls = []
+
+        @retry_on_lock
+        def view(request):
+            calls.append(request)
+            if len(calls) < 2:
+                raise OperationalError('database is locked')
+            return 'ok'
+
+        self.assertEqual(view('request'), 'ok')
+        self.assertEqual(len(calls), 2)
+
+    @override_settings(SQLITE_LOCK_RETRY_DELAY=0)
+    def test_other_errors_are_not_retried(self):
+        '''Прочие ошибки базы пробрасываются сразу'''
+        calls = []
+
+        @retry_on_lock
+        def view(request):
+            calls.append(request)
+            raise OperationalError('no such table')
+
+        with self.assertRaises(OperationalError):
+            view('request')
+        self.assertEqual(len(calls), 1)
+
+    def test_maintenance_command(self):
+        '''Команда обслуживания выполняет checkpoint и optimize'''
+        out = StringIO()
+        call_command('sqlite_maintenance', stdout=out)
+        self.assertIn('Готово', out.getvalue())
@@ -0,0 +1,125 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+
+from .images import normalize_file, original_name
+from .uploads import upload_dir
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ORIENTATION = 0x0112
+
+
+def camera_jpeg(width, height):
+    '''JPEG, повёрнутый тегом Orientation=6 и с лишним EXIF'''
+    exif = Image.Exif()
+    exif[ORIENTATION] = 6
+    exif[0x010F] = 'Камера'
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(buffer, 'JPEG',
+                                                  exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_MAX_SIDE=50)
+class NormalizeImageTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def assertNormalized(self, path):
+        with Image.open(path) as image:
+            self.assertEqual(image.size, (25, 50))
+            self.assertNotIn(ORIENTATION, image.getexif())
+            self.assertNotIn('exif', image.info)
+
+    def test_normalize_file(self):
+        '''Поворот по EXIF, уменьшение и удаление метаданных'''
+        source = os.path.join(TEMP_MEDIA_ROOT, 'source.jpg')
+        target = os.path.join(TEMP_MEDIA_ROOT, 'target.jpg')
+        with open(source, 'wb') as file:
+            file.write(camera_jpeg(400, 200))
+        self.assertEqual(normalize_file(source, target, 50, 85), (25, 50))
+        self.assertNormalized(target)
+
+    def test_upload_is_normalized_and_original_kept(self):
+        '''Загруженная картинка нормализуется, оригинал по настройке'''
+        content = camera_jpeg(400, 200)
+        with self.settings(IMAGE_KEEP_ORIGINALS=True):
+            self.client.post(reverse('posts:post_create'), {
+                'text': 'Текст',
+                'image': SimpleUploadedFile('photo.jpg', content,
+                                            content_type='image/jpeg')})
+        post = Post.objects.get()
+        self.assertNormalized(post.image.path)
+        original = os.path.join(TEMP_MEDIA_ROOT, 'originals', 'posts',
+                                'photo.jpg')
+        with open(original, 'rb') as file:
+            self.assertEqual(file.read(), content)
+
+    @override_settings(IMAGE_KEEP_ORIGINALS=True)
+    def test_original_follows_final_image_name(self):
+        '''При совпадении имён оригинал лежит рядом со своей картинкой'''
+        contents = [camera_jpeg(400, 200), camera_jpeg(200, 400)]
+        for content in contents:
+            Post.objects.create(
+                text='Текст', author=self.user,
+                image=SimpleUploadedFile('photo.jpg', content,
+                                         content_type='image/jpeg'))
+        posts = Post.objects.order_by('pk')
+        self.assertNotEqual(posts[0].image.name, posts[1].image.name)
+        for post, content in zip(posts, contents):
+            with self.subTest(name=post.image.name):
+                path = os.path.join(TEMP_MEDIA_ROOT,
+                                    original_name(post.image.name))
+                with open(path, 'rb') as file:
+                    self.assertEqual(file.read(), content)
+        self.assertEqual(os.listdir(upload_dir()), [])
+
+    def test_failed_normalization_leaves_no_temp_file(self):
+        '''Упавшая нормализация не оставляет копию в каталоге загрузок'''
+        with mock.patch('core.images.run', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                Post.objects.create(
+                    text='Текст', author=self.user,
+                    image=SimpleUploadedFile('photo.jpg', camera_jpeg(40, 20),
+                                             content_type='image/jpeg'))
+        self.assertEqual(os.listdir(upload_dir()), [])
+
+    def test_command_normalizes_stored_images(self):
+        '''Команда нормализует уже сохранённые картинки на месте'''
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'posts', 'old.jpg'),
+                  'wb') as file:
+            file.write(camera_jpeg(400, 200))
+        post = Post.objects.create(author=self.user, text='Текст')
+        Post.objects.filter(pk=post.pk).update(image='posts/old.jpg')
+        call_command('normalize_images', workers=1, stdout=io.StringIO())
+        path = os.path.join(TEMP_MEDIA_ROOT, 'posts', 'old.jpg')
+        self.assertNormalized(path)
+        with open(path, 'rb') as file:
+            content = file.read()
+        out = io.StringIO()
+        call_command('normalize_images', workers=1, stdout=out)
+        self.assertIn('Нормализовано: 0 из 0', out.getvalue())
+        with open(path, 'rb') as file:
+            self.assertEqual(file.read(), content)
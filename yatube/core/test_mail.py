@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .mail import send_queued
+from .models import OutgoingEmail
+
+User = get_user_model()
+QUEUE = 'core.mail.QueuedEmailBackend'
+LOCMEM = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class BrokenBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+@override_settings(EMAIL_BACKEND=QUEUE, MAIL_QUEUE_BACKEND=LOCMEM)
+class MailQueueTests(TestCase):
+
+    def test_send_mail_is_queued(self):
+        '''Письмо попадает в очередь, а не отправляется сразу'''
+        mail.send_mail('Тема', 'Текст', 'from@ya.ru', ['to@ya.ru'])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.filter(
+            status=OutgoingEmail.QUEUED).count(), 1)
+
+    def test_password_reset_is_queued(self):
+        '''Сброс пароля не отправляет письмо внутри запроса'''
+        User.objects.create_user(username='auth', email='auth@ya.ru',
+                                 password='pass12345')
+        Client().post(reverse('users:password_reset_form'),
+                      {'email': 'auth@ya.ru'})
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+
+    def test_send_queued_delivers_batch(self):
+        '''Очередь отправляется пачкой'''
+        for i in range(3):
+            mail.send_mail(f'Тема {i}', 'Текст', 'from@ya.ru', ['to@ya.ru'])
+        self.assertEqual(send_queued(batch_size=2), (2, 0))
+        self.assertEqual(send_queued(batch_size=2), (1, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(OutgoingEmail.objects.filter(
+            status=OutgoingEmail.SENT).count(), 3)
+
+    @override_settings(MAIL_QUEUE_BACKEND='core.test_mail.BrokenBackend',
+                       MAIL_QUEUE_MAX_ATTEMPTS=2)
+    def test_failed_message_is_retried_later(self):
+        '''Ошибка отправки откладывает письмо, затем помечает его'''
+        mail.send_mail('Тема', 'Текст', 'from@ya.ru', ['to@ya.ru'])
+        self.assertEqual(send_queued(), (0, 1))
+        outgoing = OutgoingEmail.objects.get()
+        self.assertEqual(outgoing.attempts, 1)
+        self.assertEqual(outgoing.status, OutgoingEmail.QUEUED)
+        self.assertEqual(send_queued(), (0, 0))
+        OutgoingEmail.objects.update(next_attempt=outgoing.created)
+        send_queued()
+        outgoing.refresh_from_db()
+        self.assertEqual(outgoing.status, OutgoingEmail.FAILED)
+
+    def test_message_is_stored_as_json(self):
+        '''Письмо восстанавливается из JSON со всеми полями'''
+        message = mail.EmailMultiAlternatives(
+            'Тема', 'Текст', 'from@ya.ru', ['to@ya.ru'], cc=['cc@ya.ru'],
+            headers={'X-Tag': 'reset'})
+        message.attach_alternative('<p>Текст</p>', 'text/html')
+        attachment = ('note.bin', b'\x00data', 'application/octet-stream')
+        message.attach(*attachment)
+        message.send()
+        self.assertEqual(send_queued(), (1, 0))
+        sent = mail.outbox[0]
+        self.assertEqual(sent.to, ['to@ya.ru'])
+        self.assertEqual(sent.cc, ['cc@ya.ru'])
+        self.assertEqual(sent.extra_headers, {'X-Tag': 'reset'})
+        self.assertEqual(sent.alternatives, [('<p>Текст</p>', 'text/html')])
+        self.assertEqual(sent.attachments, [attachment])
+
+    def test_claimed_message_is_not_sent_twice(self):
+        '''Письмо, взятое другим воркером, пропускается'''
+        mail.send_mail('Тема', 'Текст', 'from@ya.ru', ['to@ya.ru'])
+        later = timezone.now() + timedelta(minutes=5)
+        OutgoingEmail.objects.update(status=OutgoingEmail.SENDING,
+                                     next_attempt=later)
+        self.assertEqual(send_queued(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_stale_claim_is_retried(self):
+        '''Письмо упавшего воркера берётся снова после таймаута'''
+        mail.send_mail('Тема', 'Текст', 'from@ya.ru', ['to@ya.ru'])
+        OutgoingEmail.objects.update(status=OutgoingEmail.SENDING)
+        self.assertEqual(send_queued(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
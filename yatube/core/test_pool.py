@@ -0,0 +1,85 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.db import OperationalError
+from django.test import SimpleTestCase
+
+from .db_backends.pool import ConnectionPool, get_pool
+from .db_backends.sqlite3.base import DatabaseWrapper
+
+
+def connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def test_connection_is_reused(self):
+        '''Возвращённое соединение выдаётся повторно'''
+        pool = ConnectionPool(2, None, 1, True)
+        raw, reused = pool.checkout(connect)
+        pool.checkin(raw)
+        again, reused = pool.checkout(connect)
+        self.assertIs(again, raw)
+        self.assertTrue(reused)
+        self.assertEqual(pool.stats()['created'], 1)
+        self.assertEqual(pool.stats()['reused'], 1)
+
+    def test_old_and_broken_connections_are_replaced(self):
+        '''Старые и неработающие соединения не выдаются'''
+        pool = ConnectionPool(2, 0.01, 1, True)
+        raw, _ = pool.checkout(connect)
+        pool.checkin(raw)
+        time.sleep(0.02)
+        self.assertIsNot(pool.checkout(connect)[0], raw)
+        pool = ConnectionPool(2, None, 1, True)
+        raw, _ = pool.checkout(connect)
+        pool.checkin(raw)
+        raw.close()
+        self.assertIsNot(pool.checkout(connect)[0], raw)
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+    def test_exhausted_pool_waits_then_fails(self):
+        '''Исчерпанный пул ждёт TIMEOUT и сообщает об ошибке'''
+        pool = ConnectionPool(1, None, 0.05, False)
+        pool.checkout(connect)
+        with self.assertRaises(OperationalError):
+            pool.checkout(connect)
+        stats = pool.stats()
+        self.assertEqual((stats['waits'], stats['in_use']), (1, 1))
+
+
+class PooledBackendTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.wrapper = DatabaseWrapper({
+            'ENGINE': 'core.db_backends.sqlite3',
+            'NAME': os.path.join(self.directory, 'pool.sqlite3'),
+            'OPTIONS': {}, 'AUTOCOMMIT': True, 'CONN_MAX_AGE': 0,
+            'ATOMIC_REQUESTS': False, 'TIME_ZONE': None, 'TEST': {},
+            'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '',
+            'POOL': {'MAX_SIZE': 2}}, alias='pool-test')
+
+    def tearDown(self):
+        get_pool('pool-test', {}).close_all()
+        shutil.rmtree(self.directory)
+
+    def test_backend_returns_connections_to_pool(self):
+        '''Закрытие соединения Django возвращает его в пул'''
+        self.wrapper.ensure_connection()
+        raw = self.wrapper.connection
+        self.assertFalse(self.wrapper.connection_reused)
+        self.wrapper.close()
+        self.wrapper.ensure_connection()
+        self.assertIs(self.wrapper.connection, raw)
+        self.assertTrue(self.wrapper.connection_reused)
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0],
+                             settings.SQLITE_PRAGMAS['journal_mode'].lower())
+        self.wrapper.close()
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from .profiling import make_token
+
+PROFILING_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(PROFILING_DIR=PROFILING_DIR, PAGE_CACHE_ENABLED=False)
+class ProfilingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def tearDown(self):
+        shutil.rmtree(PROFILING_DIR, ignore_errors=True)
+
+    def profiles(self, view):
+        directory = os.path.join(PROFILING_DIR, view)
+        return os.listdir(directory) if os.path.isdir(directory) else []
+
+    def test_not_sampled_by_default(self):
+        self.client.get('/')
+        self.assertEqual(self.profiles('posts.index'), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_sampled_requests_are_saved_by_view(self):
+        self.client.get('/')
+        self.assertEqual(len(self.profiles('posts.index')), 1)
+
+    def test_signed_header_forces_profile(self):
+        '''Запрос с подписанным заголовком профилируется всегда'''
+        response = self.client.get('/', HTTP_X_PROFILE=make_token())
+        self.assertEqual(self.profiles('posts.index'),
+                         [response['X-Profile-Id']])
+        response = self.client.get('/', HTTP_X_PROFILE='profile:forged')
+        self.assertFalse(response.has_header('X-Profile-Id'))
+        self.assertEqual(len(self.profiles('posts.index')), 1)
+
+    def test_report_aggregates_profiles(self):
+        for _ in range(2):
+            self.client.get('/', HTTP_X_PROFILE=make_token())
+        out = StringIO()
+        call_command('profile_report', view='posts:index', limit=5,
+                     stdout=out)
+        self.assertIn('Профилей: 2', out.getvalue())
+        self.assertIn('cumulative', out.getvalue())
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_page_cache_hits_are_saved_apart(self):
+        '''Ответ из кеша страниц не смешивается с профилями view'''
+        self.client.get('/')
+        response = self.client.get('/', HTTP_X_PROFILE=make_token())
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertEqual(self.profiles('pagecache.posts.index'),
+                         [response['X-Profile-Id']])
+        self.assertEqual(self.profiles('unresolved'), [])
+
+    @override_settings(PROFILING_MAX_FILES=2)
+    def test_old_profiles_are_rotated(self):
+        names = [self.client.get('/', HTTP_X_PROFILE=make_token())[
+            'X-Profile-Id'] for _ in range(3)]
+        self.assertEqual(sorted(self.profiles('posts.index')), names[1:])
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .ratelimit import hit
+
+User = get_user_model()
+RULES = {'posts:add_comment': {'rate': '2/m'},
+         'posts:profile_follow': {'rate': '1/m', 'methods': ('GET',)}}
+
+
+class HitTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_refills_gradually(self):
+        '''После исчерпания лимита ведро пополняется равномерно'''
+        start = 600.0
+        self.assertEqual([hit('k', 2, 60, start) for _ in range(3)],
+                         [0, 0, 60])
+        # Следующее окно: прошлые запросы ещё почти полностью учтены
+        self.assertGreater(hit('k', 2, 60, start + 61), 0)
+        self.assertEqual(hit('k', 2, 60, start + 170), 0)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': 'local'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                   'LOCATION': 'shared'}})
+    def test_counters_live_in_shared_cache(self):
+        '''Счётчики общие для процессов, а не в кеше одного процесса'''
+        hit('k', 2, 60, 600.0)
+        self.assertEqual(caches['shared'].get('ratelimit:k:10'), 1)
+        self.assertIsNone(caches['default'].get('ratelimit:k:10'))
+
+
+@override_settings(RATELIMIT_ENABLED=True, RATELIMITS=RULES)
+class RateLimitMiddlewareTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Текст')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_comments_are_throttled_with_retry_after(self):
+        '''Сверх лимита — 429 с Retry-After, запись не выполняется'''
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        statuses = [self.client.post(url, {'text': f'Комментарий {n}'})
+                    for n in range(3)]
+        self.assertEqual([response.status_code for response in statuses],
+                         [302, 302, 429])
+        self.assertGreater(int(statuses[-1]['Retry-After']), 0)
+        self.assertEqual(self.post.comments.count(), 2)
+
+    def test_only_listed_methods_are_limited(self):
+        '''Лимит учитывает только методы из правила'''
+        url = reverse('posts:profile_follow',
+                      kwargs={'username': self.author.username})
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.assertEqual(self.client.get(url).status_code, 429)
+        profile = reverse('posts:profile',
+                          kwargs={'username': self.author.username})
+        for _ in range(3):
+            self.assertEqual(self.client.get(profile).status_code, 200)
@@ -0,0 +1,77 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sorl.thumbnail import default
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from posts.models import Post
+
+from .thumbnails import LRU, thumbnail_key
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00\x01\x00\x80\x00\x00\x00'
+             b'\x00\x00\xFF\xFF\xFF\x21\xF9\x04\x00\x00\x00\x00\x00\x2C'
+             b'\x00\x00\x00\x00\x02\x00\x01\x00\x00\x02\x02\x0C\x0A\x00'
+             b'\x3B')
+
+
+class LRUTests(TestCase):
+
+    def test_eviction_and_expiry(self):
+        '''Вытесняется давно не читанная запись, просроченная не видна'''
+        lru = LRU(2, 60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')),
+                         (1, None, 3))
+        expired = LRU(2, -1)
+        expired.set('a', 1)
+        self.assertIsNone(expired.get('a'))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailStoreTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        user = User.objects.create_user(username='auth')
+        self.posts = []
+        for number in range(3):
+            image = SimpleUploadedFile(f'{number}.gif', SMALL_GIF,
+                                       content_type='image/gif')
+            self.posts.append(Post.objects.create(
+                author=user, text=f'Пост {number}', image=image))
+        self.client = Client()
+
+    def kvstore_queries(self):
+        default.kvstore.local.clear()
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index'))
+        table = KVStoreModel._meta.db_table
+        return [query for query in queries.captured_queries
+                if table in query['sql']]
+
+    def test_page_thumbnails_are_prefetched(self):
+        '''Миниатюры страницы читаются из базы одним запросом'''
+        self.client.get(reverse('posts:index'))
+        for post in self.posts:
+            key = thumbnail_key(post.image, '960x339', crop='center',
+                                upscale=True)
+            self.assertTrue(KVStoreModel.objects.filter(key=key).exists())
+        self.assertEqual(len(self.kvstore_queries()), 1)
@@ -0,0 +1,57 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+
+from posts.models import Post
+
+from .timing import Timer
+
+User = get_user_model()
+
+
+class TimerTests(SimpleTestCase):
+
+    def test_nested_phase_is_not_counted_twice(self):
+        '''Время вложенной фазы вычитается из внешней'''
+        timer = Timer()
+        with timer.phase('template'):
+            with timer.phase('db'):
+                time.sleep(0.02)
+        total, phases = timer.result()
+        self.assertGreaterEqual(phases['db'], 20)
+        self.assertLess(phases['template'], 10)
+        self.assertAlmostEqual(
+            sum(phases.values()), total, delta=1)
+
+
+class TimingMiddlewareTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='author')
+        Post.objects.create(text='Пост', author=user)
+        self.client = Client()
+        self.client.force_login(user)
+
+    def request_log(self, url):
+        with self.assertLogs('yatube.timing', 'INFO') as logs:
+            self.client.get(url)
+        self.assertEqual(len(logs.records), 1)
+        return json.loads(logs.records[0].getMessage())
+
+    def test_one_json_line_with_phases(self):
+        line = self.request_log('/')
+        self.assertEqual((line['view'], line['status']), ('posts:index', 200))
+        for name in ('middleware', 'db', 'session', 'template', 'other'):
+            self.assertIn(name, line['phases'])
+        self.assertGreater(line['queries'], 0)
+        self.assertLessEqual(line['phases']['template'], line['total_ms'])
+
+    @override_settings(REQUEST_TIMING_ENABLED=False)
+    def test_can_be_disabled(self):
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('yatube.timing', 'INFO'):
+                self.client.get('/')
@@ -0,0 +1,62 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def png(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'white').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class StreamingUploadTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(User.objects.create_user(username='auth'))
+
+    def upload(self, content, name='image.png'):
+        image = SimpleUploadedFile(name, content, content_type='image/png')
+        return self.client.post(reverse('posts:post_create'),
+                                {'text': 'Текст', 'image': image})
+
+    def test_valid_image_is_moved_into_media(self):
+        '''Картинка сохраняется, временный файл не остаётся'''
+        self.upload(png(40, 30))
+        post = Post.objects.get()
+        self.assertTrue(os.path.exists(post.image.path))
+        self.assertEqual(os.listdir(os.path.join(TEMP_MEDIA_ROOT, 'tmp')),
+                         [])
+
+    def test_invalid_uploads_are_rejected(self):
+        '''Не картинка, большой файл и большие размеры отклоняются'''
+        cases = (
+            ({}, b'not an image' * 100, 'Загрузите корректное изображение'),
+            ({'IMAGE_UPLOAD_MAX_SIZE': 10}, png(40, 30), 'Файл больше'),
+            ({'IMAGE_UPLOAD_MAX_SIDE': 20}, png(40, 30),
+             'Изображение больше 20×20 пикселей'))
+        for overrides, content, message in cases:
+            with self.subTest(message=message), self.settings(**overrides):
+                response = self.upload(content)
+                self.assertIn(message,
+                              str(response.context['form'].errors['image']))
+                self.assertFalse(Post.objects.exists())
@@ -0,0 +1,149 @@
+'''Хранилище метаданных миниатюр sorl-thumbnail.
+
+Три уровня: LRU в памяти процесса, общий кеш и таблица sorl в базе
+как долговременная копия. Чтение идёт сверху вниз, запись — во все
+уровни сразу. prefetch() поднимает записи для целой страницы постов
+одним get_many и одним запросом к базе, после чего каждый
+{% thumbnail %} отвечает из памяти.
+'''
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, cache, caches
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import KVStoreBase, add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+
+class LRU:
+    '''Словарь ограниченного размера с временем жизни записей'''
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = (value, time.monotonic() + self.timeout)
+            self.data.move_to_end(key)
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+class KVStore(KVStoreBase):
+
+    def __init__(self):
+        super().__init__()
+        self.local = LRU(settings.THUMBNAIL_LRU_SIZE,
+                         settings.THUMBNAIL_LRU_TIMEOUT)
+        self.timeout = sorl_settings.THUMBNAIL_CACHE_TIMEOUT
+
+    @property
+    def cache(self):
+        try:
+            return caches[sorl_settings.THUMBNAIL_CACHE]
+        except InvalidCacheBackendError:
+            return cache
+
+    def prefetch(self, keys):
+        '''Загружает в LRU записи по ключам одним походом в кеш и базу'''
+        missing = [key for key in keys if self.local.get(key) is None]
+        if not missing:
+            return
+        found = self.cache.get_many(missing)
+        rest = [key for key in missing if key not in found]
+        if rest:
+            stored = dict(KVStoreModel.objects.filter(
+                key__in=rest).values_list('key', 'value'))
+            self.cache.set_many(stored, self.timeout)
+            found.update(stored)
+        for key, value in found.items():
+            self.local.set(key, value)
+
+    def clear(self):
+        super().clear()
+        self.local.clear()
+
+    def _get_raw(self, key):
+        value = self.local.get(key)
+        if value is None:
+            value = self.cache.get(key)
+            if value is None:
+                value = KVStoreModel.objects.filter(key=key).values_list(
+                    'value', flat=True).first()
+                if value is None:
+                    return None
+                self.cache.set(key, value, self.timeout)
+            self.local.set(key, value)
+        return value
+
+    def _set_raw(self, key, value):
+        KVStoreModel.objects.update_or_create(key=key,
+                                              defaults={'value': value})
+        self.cache.set(key, value, self.timeout)
+        self.local.set(key, value)
+
+    def _delete_raw(self, *keys):
+        KVStoreModel.objects.filter(key__in=keys).delete()
+        self.cache.delete_many(keys)
+        self.local.delete(*keys)
+
+    def _find_keys_raw(self, prefix):
+        return KVStoreModel.objects.filter(
+            key__startswith=prefix).values_list('key', flat=True)
+
+
+def thumbnail_key(file_, geometry_string, **options):
+    '''Ключ kvstore, под которым get_thumbnail ищет миниатюру.
+
+    Повторяет подготовку опций из ThumbnailBackend.get_thumbnail.
+    '''
+    backend = default.backend
+    source = ImageFile(file_)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry_string, options)
+    return add_prefix(ImageFile(name, default.storage).key)
+
+
+def prefetch(files, geometry_string, **options):
+    '''Поднимает метаданные миниатюр для списка файлов разом'''
+    kvstore = default.kvstore
+    if not hasattr(kvstore, 'prefetch'):
+        return
+    kvstore.prefetch([thumbnail_key(file_, geometry_string, **options)
+                      for file_ in files if file_])
@@ -0,0 +1,154 @@
+'''Разбивка времени запроса по фазам.
+
+TimingMiddleware заводит на запрос счётчик фаз и пишет в лог
+yatube.timing одну JSON-строку: общее время, время middleware до view
+и собственное время фаз db, session, template и thumbnail. Вложенная
+фаза вычитается из внешней, так что запросы к базе из шаблона не
+считаются дважды, а остаток уходит в other. Фазы отмечают
+execute_wrapper соединений, бэкенд шаблонов и бэкенд sorl из этого
+модуля; на фазу уходит пара вызовов perf_counter.
+'''
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends import django as django_backend
+from django.template.exceptions import TemplateDoesNotExist
+from sorl.thumbnail.base import ThumbnailBackend as SorlThumbnailBackend
+
+logger = logging.getLogger('yatube.timing')
+_state = threading.local()
+
+
+class Timer:
+    '''Собственное время фаз одного запроса'''
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.queries = 0
+        # Время вложенных фаз для каждой открытой фазы
+        self.children = [0.0]
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        self.children.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = self.children.pop()
+            self.children[-1] += elapsed
+            self.phases[name] = (self.phases.get(name, 0.0)
+                                 + elapsed - nested)
+
+    def mark(self, name):
+        '''Собственное время от начала запроса до этой точки'''
+        own = time.perf_counter() - self.started - self.children[0]
+        self.phases[name] = own
+        self.children[0] += own
+
+    def result(self):
+        total = time.perf_counter() - self.started
+        phases = {name: round(value * 1000, 3)
+                  for name, value in self.phases.items()}
+        phases['other'] = round((total - self.children[0]) * 1000, 3)
+        return round(total * 1000, 3), phases
+
+
+def current():
+    return getattr(_state, 'timer', None)
+
+
+@contextmanager
+def phase(name):
+    '''Учитывает блок в фазе name, если запрос замеряется'''
+    timer = current()
+    if timer is None:
+        yield
+        return
+    with timer.phase(name):
+        yield
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    timer = current()
+    if timer is None:
+        return execute(sql, params, many, context)
+    timer.queries += 1
+    name = 'session' if '"django_session"' in sql else 'db'
+    with timer.phase(name):
+        return execute(sql, params, many, context)
+
+
+class TimingMiddleware:
+    '''Пишет в лог разбивку времени запроса; ставится одним из первых'''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REQUEST_TIMING_ENABLED:
+            return self.get_response(request)
+        timer = _state.timer = Timer()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            _state.timer = None
+        self.log(request, response, timer)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timer = current()
+        if timer is not None:
+            timer.mark('middleware')
+
+    def log(self, request, response, timer):
+        total, phases = timer.result()
+        match = getattr(request, 'resolver_match', None)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': total,
+            'queries': timer.queries,
+            'phases': phases,
+        }, ensure_ascii=False))
+
+
+class Template(django_backend.Template):
+
+    def render(self, context=None, request=None):
+        with phase('template'):
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    '''Бэкенд шаблонов Django, отмечающий фазу template'''
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
+
+
+class ThumbnailBackend(SorlThumbnailBackend):
+    '''Бэкенд sorl, отмечающий фазу thumbnail'''
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        with phase('thumbnail'):
+            return super().get_thumbnail(file_, geometry_string, **options)
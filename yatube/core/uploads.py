@@ -0,0 +1,186 @@
+'''Потоковая загрузка картинок.
+
+Файл пишется кусками во временный каталог рядом с MEDIA_ROOT, откуда
+хранилище переносит его переименованием, без копирования. Формат и
+размеры проверяются по заголовку, пока файл ещё загружается: слишком
+большой или не графический файл отбрасывается, не дойдя до диска
+целиком, а форма не декодирует картинку повторно.
+'''
+import io
+import os
+import tempfile
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import (TemporaryUploadedFile,
+                                            UploadedFile)
+from django.core.files.uploadhandler import (FileUploadHandler,
+                                             StopFutureHandlers)
+from PIL import Image
+
+NOT_IMAGE = 'Загрузите корректное изображение'
+
+
+def upload_dir():
+    '''Каталог для временных файлов: в том же разделе, что и медиа'''
+    return (settings.IMAGE_UPLOAD_TEMP_DIR
+            or os.path.join(settings.MEDIA_ROOT, 'tmp'))
+
+
+class StreamedImageFile(TemporaryUploadedFile):
+    '''Загруженная картинка с уже прочитанным заголовком'''
+
+    def __init__(self, name, content_type, charset, content_type_extra,
+                 delete=True):
+        directory = upload_dir()
+        os.makedirs(directory, exist_ok=True)
+        _, ext = os.path.splitext(name)
+        file = tempfile.NamedTemporaryFile(suffix='.upload' + ext,
+                                           dir=directory, delete=delete)
+        UploadedFile.__init__(self, file, name, content_type, 0, charset,
+                              content_type_extra)
+        self.image_info = None
+
+
+class RejectedUpload(UploadedFile):
+    '''Пустой файл на месте отброшенной загрузки с причиной отказа'''
+
+    def __init__(self, name, error):
+        super().__init__(io.BytesIO(), name, None, 0)
+        self.upload_error = error
+
+
+def _too_big():
+    side = settings.IMAGE_UPLOAD_MAX_SIDE
+    return f'Изображение больше {side}×{side} пикселей'
+
+
+def check_image(image):
+    '''Текст ошибки, если формат или размеры картинки недопустимы'''
+    width, height = image.size
+    if image.format not in settings.IMAGE_UPLOAD_FORMATS:
+        return f'Формат {image.format} не поддерживается'
+    if (max(width, height) > settings.IMAGE_UPLOAD_MAX_SIDE
+            or width * height > settings.IMAGE_UPLOAD_MAX_PIXELS):
+        return _too_big()
+    return None
+
+
+class StreamingImageUploadHandler(FileUploadHandler):
+    '''Обрабатывает файлы image/*, остальные отдаёт следующим обработчикам.
+
+    В памяти одновременно лежат только текущий кусок и заголовок,
+    не длиннее IMAGE_UPLOAD_HEADER_LIMIT.
+    '''
+    chunk_size = 64 * 2 ** 10
+    request_too_large = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        # Тело больше лимита файла и всех прочих полей вместе —
+        # значит, файл заведомо слишком велик и писать его незачем.
+        limit = (settings.IMAGE_UPLOAD_MAX_SIZE
+                 + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0))
+        self.request_too_large = content_length > limit
+
+    def new_file(self, field_name, file_name, content_type, content_length,
+                 charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type,
+                         content_length, charset, content_type_extra)
+        self.active = content_type.startswith('image/')
+        if not self.active:
+            return
+        self.file = None
+        self.header = b''
+        self.error = None
+        self.size = 0
+        if self.request_too_large:
+            self.reject(self.size_error())
+        else:
+            self.file = StreamedImageFile(file_name, content_type, charset,
+                                          content_type_extra)
+        raise StopFutureHandlers()
+
+    def size_error(self):
+        megabytes = settings.IMAGE_UPLOAD_MAX_SIZE / 2 ** 20
+        return f'Файл больше {megabytes:g} МБ'
+
+    def reject(self, error):
+        self.error = error
+        self.header = b''
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def inspect(self, raw_data):
+        self.header += raw_data
+        try:
+            with Image.open(io.BytesIO(self.header)) as image:
+                error = check_image(image)
+                info = {'format': image.format, 'size': image.size}
+        except Image.DecompressionBombError:
+            error = _too_big()
+        except OSError:
+            if len(self.header) >= settings.IMAGE_UPLOAD_HEADER_LIMIT:
+                self.reject(NOT_IMAGE)
+            return
+        if error:
+            self.reject(error)
+        else:
+            self.header = b''
+            self.file.image_info = info
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        if self.error:
+            return None
+        self.size += len(raw_data)
+        if self.size > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self.reject(self.size_error())
+            return None
+        if self.file.image_info is None:
+            self.inspect(raw_data)
+        if not self.error:
+            self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        if not self.error and self.file.image_info is None:
+            self.reject(NOT_IMAGE)
+        if self.error:
+            return RejectedUpload(self.file_name, self.error)
+        self.file.seek(0)
+        self.file.size = file_size
+        return self.file
+
+    def upload_interrupted(self):
+        if getattr(self, 'file', None) is not None:
+            self.file.close()
+
+
+def accept_streamed_images(field):
+    '''Учит ImageField доверять проверке StreamingImageUploadHandler.
+
+    Тип поля не меняется; файлы, пришедшие другим путём, проверяются
+    как обычно — полным декодированием.
+    '''
+    default = field.to_python
+
+    def to_python(data):
+        error = getattr(data, 'upload_error', None)
+        if error:
+            raise ValidationError(error, code='invalid_image')
+        info = getattr(data, 'image_info', None)
+        if info is None:
+            return default(data)
+        f = forms.FileField.to_python(field, data)
+        if f is not None:
+            f.content_type = Image.MIME.get(info['format'])
+        return f
+
+    field.to_python = to_python
+    return field
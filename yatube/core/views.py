@@ -1,7 +1,11 @@
 from http import HTTPStatus
 
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from .db_backends.pool import pool_stats
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html',
@@ -16,3 +20,8 @@ def server_error(request):
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html',
                   status=HTTPStatus.FORBIDDEN)
+
+
+@staff_member_required
+def db_pool_stats(request):
+    return JsonResponse(pool_stats())
@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import Event, Notification
+
+
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'recipient', 'kind', 'actor', 'post', 'count',
+                    'is_read', 'updated')
+    list_filter = ('kind', 'is_read')
+    raw_id_fields = ('recipient', 'actor', 'post', 'archived_post')
+
+
+class EventAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'kind', 'actor', 'post', 'created')
+    list_filter = ('kind',)
+    raw_id_fields = ('actor', 'post', 'archived_post')
+
+
+admin.site.register(Notification, NotificationAdmin)
+admin.site.register(Event, EventAdmin)
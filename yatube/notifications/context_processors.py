@@ -0,0 +1,8 @@
+from functools import partial
+
+from .fanout import unread_count
+
+
+def unread(request):
+    '''Счётчик непрочитанных; считается, только если шаблон его выведет'''
+    return {'unread_notifications': partial(unread_count, request.user)}
@@ -0,0 +1,108 @@
+'''Рассылка уведомлений по очереди событий.
+
+Запрос кладёт одно Event на действие. Воркер забирает события
+пачкой, собирает получателей (подписчиков автора или автора записи),
+склеивает повторы в одно непрочитанное уведомление с count и пишет
+результат через bulk_create/bulk_update.
+'''
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from posts.models import Follow
+
+from .models import COMMENT, POST, Event, Notification
+
+
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user):
+    '''Число непрочитанных уведомлений; хранится в кеше'''
+    if not user.is_authenticated:
+        return 0
+    count = cache.get(_unread_key(user.pk))
+    if count is None:
+        count = Notification.objects.filter(recipient=user,
+                                            is_read=False).count()
+        cache.set(_unread_key(user.pk), count,
+                  settings.NOTIFICATIONS_UNREAD_TIMEOUT)
+    return count
+
+
+def forget_unread(*user_ids):
+    cache.delete_many([_unread_key(user_id) for user_id in user_ids])
+
+
+def mark_read(user):
+    Notification.objects.filter(recipient=user, is_read=False).update(
+        is_read=True)
+    forget_unread(user.pk)
+
+
+def _recipients(events):
+    '''{(получатель, ключ): [событие, ...]} для пачки событий'''
+    authors = {event.actor_id for event in events if event.kind == POST}
+    followers = defaultdict(list)
+    for user_id, author_id in Follow.objects.filter(
+            author_id__in=authors).values_list('user_id', 'author_id'):
+        followers[author_id].append(user_id)
+    grouped = defaultdict(list)
+    for event in events:
+        if event.kind == POST:
+            key = f'{POST}:{event.actor_id}'
+            recipients = followers[event.actor_id]
+        else:
+            key = f'{COMMENT}:{event.target_id}'
+            recipients = [event.target.author_id]
+        for user_id in recipients:
+            if user_id != event.actor_id:
+                grouped[user_id, key].append(event)
+    return grouped
+
+
+def process(batch_size=None):
+    '''Обрабатывает одну пачку событий; возвращает их количество'''
+    batch_size = batch_size or settings.NOTIFICATIONS_BATCH_SIZE
+    with transaction.atomic():
+        events = list(Event.objects.select_related(
+            'post', 'archived_post')[:batch_size])
+        if not events:
+            return 0
+        grouped = _recipients(events)
+        existing = {}
+        for notification in Notification.objects.filter(
+                is_read=False,
+                recipient_id__in={user_id for user_id, _ in grouped},
+                key__in={key for _, key in grouped}):
+            existing[notification.recipient_id, notification.key] = (
+                notification)
+        created, updated = [], []
+        now = timezone.now()
+        for (user_id, key), items in grouped.items():
+            latest = items[-1]
+            notification = existing.get((user_id, key))
+            if notification is None:
+                created.append(Notification(
+                    recipient_id=user_id, kind=latest.kind, key=key,
+                    actor_id=latest.actor_id, post_id=latest.post_id,
+                    archived_post_id=latest.archived_post_id,
+                    count=len(items)))
+            else:
+                notification.count += len(items)
+                notification.actor_id = latest.actor_id
+                notification.post_id = latest.post_id
+                notification.archived_post_id = latest.archived_post_id
+                notification.updated = now
+                updated.append(notification)
+        Notification.objects.bulk_create(created, batch_size=batch_size)
+        Notification.objects.bulk_update(
+            updated, ['count', 'actor', 'post', 'archived_post', 'updated'],
+            batch_size=batch_size)
+        Event.objects.filter(pk__in=[event.pk for event in events]).delete()
+    forget_unread(*{notification.recipient_id for notification in created})
+    return len(events)
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.fanout import process
+
+
+class Command(BaseCommand):
+    help = 'Рассылает уведомления по очереди событий пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.NOTIFICATIONS_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true',
+                            help='Работать постоянно')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Пауза между пачками, сек.')
+
+    def handle(self, *args, **options):
+        while True:
+            while True:
+                done = process(options['batch_size'])
+                if done:
+                    self.stdout.write(f'Обработано событий: {done}')
+                if done < options['batch_size']:
+                    break
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+from posts.models import ArchivedPost, Post
+
+User = get_user_model()
+
+POST = 'post'
+COMMENT = 'comment'
+KIND_CHOICES = ((POST, 'Новая запись'),
+                (COMMENT, 'Новый комментарий'))
+
+
+class TargetMixin:
+    '''Пост события: живой или уже перенесённый в архив'''
+
+    @property
+    def target(self):
+        return self.post if self.post_id else self.archived_post
+
+    @property
+    def target_id(self):
+        return self.post_id or self.archived_post_id
+
+
+class Event(TargetMixin, models.Model):
+    '''Действие, о котором ещё не разосланы уведомления'''
+    kind = models.CharField('Тип', max_length=10, choices=KIND_CHOICES)
+    actor = models.ForeignKey(User, on_delete=models.CASCADE,
+                              related_name='+', verbose_name='Автор')
+    # После архивации поста ссылка переходит в archived_post (id тот же)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, null=True,
+                             related_name='+', verbose_name='Запись')
+    archived_post = models.ForeignKey(ArchivedPost,
+                                      on_delete=models.CASCADE,
+                                      null=True, blank=True,
+                                      related_name='+',
+                                      verbose_name='Запись в архиве')
+    created = models.DateTimeField('Создано', auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.kind} {self.target_id}'
+
+    class Meta:
+        verbose_name = 'Событие'
+        verbose_name_plural = 'События'
+        ordering = ('pk',)
+
+
+class Notification(TargetMixin, models.Model):
+    '''Уведомление; повторы одного события копятся в count'''
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE,
+                                  related_name='notifications',
+                                  verbose_name='Получатель')
+    kind = models.CharField('Тип', max_length=10, choices=KIND_CHOICES)
+    # Ключ склейки: comment:<post_id> или post:<author_id>
+    key = models.CharField('Ключ', max_length=50)
+    actor = models.ForeignKey(User, on_delete=models.CASCADE,
+                              related_name='+', verbose_name='Автор')
+    # После архивации поста ссылка переходит в archived_post (id тот же)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, null=True,
+                             related_name='+', verbose_name='Запись')
+    archived_post = models.ForeignKey(ArchivedPost,
+                                      on_delete=models.CASCADE,
+                                      null=True, blank=True,
+                                      related_name='+',
+                                      verbose_name='Запись в архиве')
+    count = models.PositiveIntegerField('Количество', default=1)
+    is_read = models.BooleanField('Прочитано', default=False)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    def __str__(self):
+        if self.kind == COMMENT:
+            if self.count == 1:
+                return (f'{self.actor.username} прокомментировал(а) '
+                        f'запись «{self.target}»')
+            return f'Новых комментариев к записи «{self.target}»: {self.count}'
+        if self.count == 1:
+            return f'Новая запись автора {self.actor.username}'
+        return f'Новых записей автора {self.actor.username}: {self.count}'
+
+    class Meta:
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        ordering = ('-updated',)
+        indexes = [models.Index(fields=['recipient', 'is_read', 'key'],
+                                name='notification_unread_idx')]
@@ -0,0 +1,46 @@
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from core.db import post_bulk_create
+from posts.archive import posts_archived
+from posts.models import Comment, Post
+
+from .models import COMMENT, POST, Event, Notification
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        Event.objects.create(kind=POST, actor_id=instance.author_id,
+                             post=instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        Event.objects.create(kind=COMMENT, actor_id=instance.author_id,
+                             post_id=instance.post_id)
+
+
+@receiver(post_bulk_create, sender=Post)
+def posts_bulk_created(sender, instances, **kwargs):
+    Event.objects.bulk_create([
+        Event(kind=POST, actor_id=post.author_id, post_id=post.pk)
+        for post in instances])
+
+
+@receiver(post_bulk_create, sender=Comment)
+def comments_bulk_created(sender, instances, **kwargs):
+    Event.objects.bulk_create([
+        Event(kind=COMMENT, actor_id=comment.author_id,
+              post_id=comment.post_id)
+        for comment in instances])
+
+
+@receiver(posts_archived, sender=Post)
+def posts_archived_moved(sender, ids, **kwargs):
+    '''Переводит уведомления и ждущие события на архивные копии'''
+    for model in (Notification, Event):
+        model.objects.filter(post_id__in=ids).update(
+            archived_post=F('post'), post=None)
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.archive import archive
+from posts.models import Comment, Follow, Post
+
+from .fanout import process
+from .models import Event, Notification
+
+User = get_user_model()
+
+
+class ArchivedPostNotificationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.post = Post.objects.create(author=self.author, text='Старый')
+        Post.objects.filter(pk=self.post.pk).update(
+            pub_date=timezone.now() - timedelta(days=400))
+
+    def test_notifications_survive_archiving(self):
+        '''Уведомления о посте переходят на его архивную копию'''
+        process()
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        process()
+        self.assertEqual(Notification.objects.count(), 2)
+        archive(before=timezone.now() - timedelta(days=1))
+        self.assertEqual(Notification.objects.filter(
+            post=None, archived_post_id=self.post.pk).count(), 2)
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(reverse('notifications:index'))
+        self.assertContains(response, reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertContains(response, 'запись «Старый»')
+
+    def test_pending_events_are_delivered_after_archiving(self):
+        '''Событие, не разосланное до архивации, всё равно доходит'''
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        archive(before=timezone.now() - timedelta(days=1))
+        self.assertEqual(Event.objects.filter(post=None).count(), 2)
+        process()
+        self.assertTrue(Notification.objects.filter(
+            recipient=self.author, archived_post_id=self.post.pk).exists())
+        self.assertTrue(Notification.objects.filter(
+            recipient=self.reader, archived_post_id=self.post.pk).exists())
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post
+
+from .fanout import process, unread_count
+from .models import Event, Notification
+
+User = get_user_model()
+
+
+class FanoutTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.readers = [User.objects.create_user(username=f'reader{n}')
+                        for n in range(3)]
+        Follow.objects.bulk_create([Follow(user=reader, author=self.author)
+                                    for reader in self.readers])
+        self.post = Post.objects.create(author=self.author, text='Текст')
+
+    def test_action_enqueues_single_event(self):
+        '''На действие пишется одно событие, а не строка на подписчика'''
+        self.assertEqual(Event.objects.count(), 1)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_posts_fan_out_to_followers(self):
+        '''Подписчики получают уведомление, повторы склеиваются'''
+        process()
+        Post.objects.create(author=self.author, text='Ещё текст')
+        process()
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(set(Notification.objects.values_list(
+            'count', flat=True)), {2})
+        self.assertFalse(Event.objects.exists())
+
+    def test_comment_burst_is_coalesced(self):
+        '''Пачка комментариев — одно уведомление автору со счётчиком'''
+        process()
+        for reader in self.readers + [self.author]:
+            Comment.objects.create(post=self.post, author=reader,
+                                   text='Комментарий')
+        with self.assertNumQueries(6):
+            process()
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.count, 3)
+        self.assertIn('Новых комментариев', str(notification))
+
+    def test_unread_count_is_cached_and_reset(self):
+        '''Счётчик непрочитанных из кеша, страница уведомлений сбрасывает'''
+        process()
+        reader = self.readers[0]
+        self.assertEqual(unread_count(reader), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(reader), 1)
+        client = Client()
+        client.force_login(reader)
+        response = client.get(reverse('notifications:index'))
+        self.assertContains(response, 'Новая запись автора author')
+        self.assertEqual(unread_count(reader), 0)
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+
+from .fanout import mark_read
+
+
+@login_required
+def index(request):
+    template = 'notifications/index.html'
+    notifications = list(request.user.notifications.select_related(
+        'actor', 'post', 'archived_post')[:settings.NOTIFICATIONS_PAGE_SIZE])
+    mark_read(request.user)
+    return render(request, template, {'notifications': notifications})
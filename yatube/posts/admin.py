@@ -1,28 +1,53 @@
 from django.contrib import admin
 
-from .models import Comment, Follow, Group, Post
+from .models import ArchivedPost, Comment, Follow, Group, Post
+from .purge import soft_delete_comments, soft_delete_posts
 
 
-class PostAdmin(admin.ModelAdmin):
+class SoftDeleteAdmin(admin.ModelAdmin):
+    '''Удаление из админки только ставит отметку is_deleted'''
+    soft_delete = None
+
+    def get_queryset(self, request):
+        return self.model.all_objects.get_queryset()
+
+    def get_deleted_objects(self, objs, request):
+        # Каскад не собираем: строки удалит purge_deleted
+        objs = list(objs)
+        return ([str(obj) for obj in objs],
+                {self.model._meta.verbose_name_plural: len(objs)},
+                set(), [])
+
+    def delete_model(self, request, obj):
+        self.soft_delete(self.model.all_objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        self.soft_delete(queryset)
+
+
+class PostAdmin(SoftDeleteAdmin):
     list_display = ('pk', 'text',
                     'pub_date', 'author',
-                    'group')
+                    'group', 'views', 'is_deleted')
     list_editable = ('group',)
+    readonly_fields = ('views',)
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = ('pub_date', 'is_deleted')
     empty_value_display = '-пусто-'
+    soft_delete = staticmethod(soft_delete_posts)
 
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('title', 'description')
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(SoftDeleteAdmin):
     list_display = ('pk', 'text',
-                    'author', 'post')
+                    'author', 'post', 'is_deleted')
     search_fields = ('text',)
-    list_filter = ('post',)
+    list_filter = ('post', 'is_deleted')
     empty_value_display = '-пусто-'
+    soft_delete = staticmethod(soft_delete_comments)
 
 
 class FollowAdmin(admin.ModelAdmin):
@@ -30,7 +55,20 @@ class FollowAdmin(admin.ModelAdmin):
     search_fields = ('author',)
 
 
+class ArchivedPostAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'archived')
+    search_fields = ('text',)
+    list_filter = ('pub_date',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(ArchivedPost, ArchivedPostAdmin)
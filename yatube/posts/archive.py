@@ -0,0 +1,68 @@
+'''Перенос старых постов в архивные таблицы.
+
+Посты старше ARCHIVE_AFTER_DAYS вместе с комментариями копируются в
+ArchivedPost/ArchivedComment с теми же id и удаляются из Post/Comment,
+так что ленты и их индексы работают только с горячими строками.
+post_detail, не найдя пост, ищет его в архиве. Перед удалением пачки
+отправляется сигнал posts_archived: приложения, которые ссылаются на
+посты, переводят свои строки на архивные копии, а не теряют их каскадом.
+'''
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from . import signals
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+POST_FIELDS = ('id', 'text', 'text_html', 'group_id', 'author_id', 'image',
+               'views', 'pub_date')
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'pub_date')
+
+# ids — посты пачки: архивные копии уже созданы, строки Post ещё на месте
+posts_archived = Signal(providing_args=['ids'])
+
+
+def cutoff(days=None):
+    days = settings.ARCHIVE_AFTER_DAYS if days is None else days
+    return timezone.now() - timedelta(days=days)
+
+
+def candidates(before):
+    return Post.objects.filter(pub_date__lt=before).order_by('pk')
+
+
+def archive_batch(before, batch_size):
+    '''Переносит одну пачку постов; возвращает (постов, комментариев)'''
+    with transaction.atomic():
+        posts = list(candidates(before).values(*POST_FIELDS)[:batch_size])
+        if not posts:
+            return 0, 0
+        ids = [post['id'] for post in posts]
+        comments = list(Comment.objects.filter(
+            post_id__in=ids).order_by().values(*COMMENT_FIELDS))
+        ArchivedPost.objects.bulk_create(
+            [ArchivedPost(**post) for post in posts], batch_size=batch_size)
+        ArchivedComment.objects.bulk_create(
+            [ArchivedComment(**comment) for comment in comments],
+            batch_size=batch_size)
+        posts_archived.send(sender=Post, ids=ids)
+        with signals.muted():
+            Post.objects.filter(pk__in=ids).delete()
+        signals.forget_posts(posts)
+    return len(posts), len(comments)
+
+
+def archive(before=None, batch_size=None):
+    '''Переносит в архив все посты старше before'''
+    before = before or cutoff()
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    total_posts = total_comments = 0
+    while True:
+        posts, comments = archive_batch(before, batch_size)
+        if not posts:
+            return total_posts, total_comments
+        total_posts += posts
+        total_comments += comments
@@ -0,0 +1,181 @@
+'''RSS/Atom-ленты: общая, группы и автора.
+
+XML рендерится заранее и хранится в общем для процессов кеше
+FEED_CACHE вместе с ETag и временем сборки. Запрос ленты лишь отдаёт
+готовые байты или 304. Изменения постов, групп и имён авторов только
+помечают ленты устаревшими, а фоновый поток процесса, где случилась
+правка, раз в FEED_RERENDER_DELAY секунд собирает каждую помеченную
+ленту один раз, сколько бы правок ни пришло за это время. Снимок
+живёт FEED_CACHE_TIMEOUT, после чего ленту соберёт первый запрос.
+'''
+import hashlib
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.core.cache import caches
+from django.http import Http404, HttpRequest
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from core.counters import BufferedCounter
+
+from .models import Group, Post
+
+User = get_user_model()
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+    url_name = 'posts:index_feed'
+
+    def link(self, obj=None):
+        return reverse('posts:index')
+
+    def feed_url(self, obj=None):
+        return reverse(self.url_name, kwargs=self.url_kwargs(obj))
+
+    def url_kwargs(self, obj):
+        return {}
+
+    def items(self, obj=None):
+        return Post.objects.select_related(
+            'author', 'group')[:settings.FEED_SIZE]
+
+    def item_title(self, item):
+        return str(item)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.username
+
+
+class GroupFeed(LatestPostsFeed):
+    url_name = 'posts:group_feed'
+
+    def get_object(self, request, key):
+        return get_object_or_404(Group, slug=key)
+
+    def url_kwargs(self, obj):
+        return {'slug': obj.slug}
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', kwargs={'slug': obj.slug})
+
+    def items(self, obj):
+        return obj.posts.select_related('author',
+                                        'group')[:settings.FEED_SIZE]
+
+
+class AuthorFeed(LatestPostsFeed):
+    url_name = 'posts:profile_feed'
+
+    def get_object(self, request, key):
+        return get_object_or_404(User, username=key)
+
+    def url_kwargs(self, obj):
+        return {'username': obj.username}
+
+    def title(self, obj):
+        return f'Yatube: записи {obj.username}'
+
+    def description(self, obj):
+        return f'Новые записи автора {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', kwargs={'username': obj.username})
+
+    def items(self, obj):
+        return obj.posts.select_related('author',
+                                        'group')[:settings.FEED_SIZE]
+
+
+def _atom(feed_class):
+    return type(f'Atom{feed_class.__name__}', (feed_class,), {
+        'feed_type': Atom1Feed,
+        'subtitle': feed_class.description,
+        'url_name': feed_class.url_name.replace('_feed', '_atom')})
+
+
+FEEDS = {}
+for kind, feed_class in (('index', LatestPostsFeed),
+                         ('group', GroupFeed),
+                         ('profile', AuthorFeed)):
+    FEEDS[kind, 'rss'] = feed_class()
+    FEEDS[kind, 'atom'] = _atom(feed_class)()
+
+
+def _cache_key(kind, fmt, key):
+    digest = hashlib.md5(str(key).encode()).hexdigest()
+    return f'feed:{kind}:{fmt}:{digest}'
+
+
+def _cache():
+    return caches[settings.FEED_CACHE]
+
+
+def _site_request():
+    '''Запрос-заглушка с адресом сайта для сборки абсолютных ссылок'''
+    site = urlsplit(settings.SITE_URL)
+    request = HttpRequest()
+    # Адрес из настроек, сверять его с ALLOWED_HOSTS незачем
+    request.get_host = lambda: site.netloc
+    request.is_secure = lambda: site.scheme == 'https'
+    return request
+
+
+def render(kind, fmt, key=None):
+    '''Собирает ленту от SITE_URL и сохраняет снимок; возвращает его'''
+    args = (key,) if key is not None else ()
+    response = FEEDS[kind, fmt](_site_request(), *args)
+    snapshot = {
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'etag': hashlib.md5(response.content).hexdigest(),
+        'last_modified': time.time()}
+    _cache().set(_cache_key(kind, fmt, key), snapshot,
+                 settings.FEED_CACHE_TIMEOUT)
+    return snapshot
+
+
+def snapshot(kind, fmt, key=None):
+    cached = _cache().get(_cache_key(kind, fmt, key))
+    return cached or render(kind, fmt, key)
+
+
+def rerender(*feeds):
+    '''Пересобирает ленты (kind, key) в обоих форматах'''
+    for kind, key in feeds:
+        for fmt in ('rss', 'atom'):
+            try:
+                render(kind, fmt, key)
+            except Http404:
+                _cache().delete(_cache_key(kind, fmt, key))
+
+
+dirty = BufferedCounter(lambda stale: rerender(*stale),
+                        settings.FEED_RERENDER_DELAY)
+
+
+def mark_dirty(*feeds):
+    '''Помечает ленты (kind, key) для пересборки фоновым потоком'''
+    for feed in feeds:
+        dirty.incr(feed)
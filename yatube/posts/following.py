@@ -0,0 +1,66 @@
+'''Кто на кого подписан: отсортированный массив id авторов в кеше.
+
+Для каждого пользователя хранится array('q') с id авторов, на которых
+он подписан, упакованный в байты — 8 байт на подписку. Проверка
+одного автора — бинарный поиск, проверка целой страницы — один
+поход в кеш. Запись сбрасывается сигналами Follow. Кеш — общий для
+процессов FOLLOWING_CACHE: иначе сброс в одном процессе не увидят
+остальные, и они покажут старую подписку до истечения записи.
+'''
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Follow
+
+
+def _cache():
+    return caches[settings.FOLLOWING_CACHE]
+
+
+def _key(user_id):
+    return f'following:{user_id}'
+
+
+def followed_ids(user_id):
+    '''Отсортированный массив id авторов, на которых подписан user_id'''
+    packed = _cache().get(_key(user_id))
+    ids = array('q')
+    if packed is None:
+        ids.extend(Follow.objects.filter(user_id=user_id).order_by(
+            'author_id').values_list('author_id', flat=True))
+        _cache().set(_key(user_id), ids.tobytes(),
+                     settings.FOLLOWING_CACHE_TIMEOUT)
+    else:
+        ids.frombytes(packed)
+    return ids
+
+
+def _contains(ids, author_id):
+    index = bisect_left(ids, author_id)
+    return index < len(ids) and ids[index] == author_id
+
+
+def is_following(user, author_id):
+    if not user.is_authenticated:
+        return False
+    return _contains(followed_ids(user.pk), author_id)
+
+
+def following_many(user, author_ids):
+    '''Подмножество author_ids, на которых подписан пользователь'''
+    if not user.is_authenticated:
+        return set()
+    ids = followed_ids(user.pk)
+    return {author_id for author_id in author_ids
+            if _contains(ids, author_id)}
+
+
+def invalidate(user_id):
+    # Второй сброс после коммита: иначе параллельный запрос успеет
+    # положить в кеш состояние до транзакции
+    _cache().delete(_key(user_id))
+    transaction.on_commit(lambda: _cache().delete(_key(user_id)))
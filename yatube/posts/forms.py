@@ -1,3 +1,4 @@
+from core.uploads import accept_streamed_images
 from django.core.exceptions import ValidationError
 from django.forms import ModelForm
 
@@ -12,6 +13,10 @@ class PostForm(ModelForm):
                      'group': 'Группа',
                      'image': 'Изображение'}
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        accept_streamed_images(self.fields['image'])
+
 
 class CommentForm(ModelForm):
     class Meta:
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive, candidates, cutoff
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты и их комментарии в архивные таблицы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=settings.ARCHIVE_AFTER_DAYS,
+                            help='Возраст поста в днях')
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать посты')
+
+    def handle(self, *args, **options):
+        before = cutoff(options['days'])
+        if options['dry_run']:
+            count = candidates(before).count()
+            self.stdout.write(f'Будет перенесено постов: {count}')
+            return
+        posts, comments = archive(before, options['batch_size'])
+        self.stdout.write(f'Перенесено в архив постов: {posts}, '
+                          f'комментариев: {comments}')
@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+
+from posts.models import Post
+
+INCLUDE = ('{% for post in posts %}'
+           "{% include 'posts/group-article.html' with "
+           'profile_link_flag=True author_link=True %}'
+           '{% endfor %}')
+CARD = ('{% load post_cards %}{% for post in posts %}'
+        '{% post_card post profile_link_flag=True author_link=True '
+        'last=forloop.last %}'
+        '{% endfor %}')
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает отрисовку ленты через include и через post_card'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int,
+                            default=settings.NUMBER_OF_POSTS)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--no-cache', action='store_true',
+                            help='Без кеширующего загрузчика')
+
+    def engine(self, cached):
+        loaders = settings.YATUBE_TEMPLATE_LOADERS
+        if cached:
+            loaders = [('django.template.loaders.cached.Loader', loaders)]
+        config = settings.TEMPLATES[0]
+        # Процессоры контекста те же, что у сайта: include видит весь
+        # контекст страницы, и от его глубины зависит цена поиска имён
+        return DjangoTemplates({
+            'NAME': 'bench', 'DIRS': config['DIRS'], 'APP_DIRS': False,
+            'OPTIONS': {**config['OPTIONS'], 'loaders': loaders}})
+
+    def handle(self, *args, **options):
+        posts = list(Post.objects.select_related(
+            'author', 'group')[:options['posts']])
+        if not posts:
+            self.stderr.write('Нет постов для отрисовки')
+            return
+        engine = self.engine(not options['no_cache'])
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        context = {'posts': posts}
+        for name, source in (('include', INCLUDE), ('post_card', CARD)):
+            template = engine.from_string(source)
+            template.render(context, request)
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                template.render(context, request)
+            elapsed = time.perf_counter() - started
+            per_post = elapsed / options['repeat'] / len(posts) * 10 ** 6
+            self.stdout.write(f'{name}: {per_post:.1f} мкс на пост')
@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from posts.media_gc import Collector, ReferencedSet
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из MEDIA_ROOT картинки и миниатюры без ссылок из базы '
+            'и брошенные временные загрузки')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать лишние файлы')
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--min-age', type=int,
+                            help='Не трогать файлы моложе, сек.')
+        parser.add_argument('--progress', type=int, default=100000,
+                            help='Печатать прогресс каждые N файлов')
+
+    def report(self, collector):
+        self.stderr.write(
+            f'Просмотрено: {collector.scanned}, '
+            f'лишних: {collector.orphaned}, удалено: {collector.removed}, '
+            f'освобождено: {collector.freed / 2 ** 20:.1f} МБ')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            refs = ReferencedSet(os.path.join(directory, 'referenced.db'))
+            try:
+                collector = Collector(
+                    refs, workers=options['workers'],
+                    batch_size=options['batch_size'],
+                    min_age=options['min_age'],
+                    dry_run=options['dry_run'])
+                self.stderr.write(f'Файлов в базе: {collector.fill()}')
+                reported = 0
+                for orphans in collector.run():
+                    if options['dry_run']:
+                        for path in orphans:
+                            self.stdout.write(path)
+                    if collector.scanned - reported >= options['progress']:
+                        reported = collector.scanned
+                        self.report(collector)
+            finally:
+                refs.close()
+        self.report(collector)
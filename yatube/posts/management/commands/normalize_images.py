@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import delete
+
+from core.images import (is_normalized, normalize_file, options,
+                         original_name)
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Нормализует уже загруженные картинки постов на месте; '
+            'уже нормализованные пропускаются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def skip(self, path):
+        '''Повторный прогон не пережимает нормализованные картинки'''
+        try:
+            return is_normalized(path, settings.IMAGE_MAX_SIDE)
+        except OSError as error:
+            self.stderr.write(f'{path}: {error}')
+            return True
+
+    def replace(self, name, target, future):
+        try:
+            size = future.result()
+        except OSError as error:
+            self.stderr.write(f'{name}: {error}')
+            size = None
+        if size is None:
+            if os.path.exists(target):
+                os.remove(target)
+            return False
+        path = default_storage.path(name)
+        if settings.IMAGE_KEEP_ORIGINALS:
+            kept = default_storage.path(original_name(name))
+            if not os.path.exists(kept):
+                os.makedirs(os.path.dirname(kept), exist_ok=True)
+                shutil.copy2(path, kept)
+        os.replace(target, path)
+        # Миниатюры собраны из старого файла
+        delete(name, delete_file=False)
+        return True
+
+    def handle(self, *args, **options_):
+        names = (Post.objects.exclude(image='').order_by()
+                 .values_list('image', flat=True).distinct())
+        done = total = 0
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(options_['workers'],
+                                 mp_context=context) as executor:
+            batch = []
+            for name in names.iterator():
+                path = default_storage.path(name)
+                if not os.path.exists(path) or self.skip(path):
+                    continue
+                root, ext = os.path.splitext(path)
+                target = f'{root}.normalized{ext}'
+                batch.append((name, target, executor.submit(
+                    normalize_file, path, target, **options())))
+                if len(batch) >= options_['batch_size']:
+                    done += sum(self.replace(*item) for item in batch)
+                    total += len(batch)
+                    batch = []
+            done += sum(self.replace(*item) for item in batch)
+            total += len(batch)
+        self.stdout.write(f'Нормализовано: {done} из {total}')
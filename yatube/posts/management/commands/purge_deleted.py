@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.purge import purge
+
+
+class Command(BaseCommand):
+    help = 'Пачками удаляет помеченные посты, комментарии и пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.PURGE_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true',
+                            help='Работать постоянно')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Пауза, когда работы нет, сек.')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            done = purge(options['batch_size'])
+            total += done
+            if done:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(f'Удалено строк: {total}')
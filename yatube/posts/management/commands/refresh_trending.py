@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import refresh
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает список популярных постов и групп'
+
+    def handle(self, *args, **options):
+        top = refresh()
+        self.stdout.write(f'Постов: {len(top["posts"])}, '
+                          f'групп: {len(top["groups"])}')
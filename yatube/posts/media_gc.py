@@ -0,0 +1,239 @@
+'''Сборка мусора в MEDIA_ROOT.
+
+Имена файлов, на которые ссылается база (картинки постов, архива,
+сохранённые оригиналы и миниатюры sorl из kvstore), потоком пишутся во
+временную SQLite-таблицу на диске, так что память не растёт с числом
+файлов. Дерево обходит несколько потоков через os.scandir; пачки
+найденных файлов сверяются с таблицей, лишние удаляются. Файлы моложе
+MEDIA_GC_MIN_AGE не трогаются: их пост мог ещё не сохраниться. В
+каталоге временных загрузок ссылок не бывает, поэтому оттуда удаляется
+всё старше этого срока — копии, брошенные упавшим сохранением.
+'''
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from sorl.thumbnail import default
+from sorl.thumbnail.helpers import deserialize
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core.images import original_name
+from core.uploads import upload_dir
+
+from .models import ArchivedPost, Post
+
+logger = logging.getLogger(__name__)
+# Предел числа параметров в одном запросе SQLite
+SQLITE_CHUNK = 500
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class ReferencedSet:
+    '''Множество имён файлов в SQLite-файле на диске'''
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode = OFF')
+        self.db.execute('PRAGMA synchronous = OFF')
+        self.db.execute('CREATE TABLE IF NOT EXISTS names '
+                        '(name TEXT PRIMARY KEY) WITHOUT ROWID')
+
+    def add_many(self, names):
+        self.db.executemany('INSERT OR IGNORE INTO names VALUES (?)',
+                            ((name,) for name in names))
+        self.db.commit()
+
+    def missing(self, names):
+        '''Имена из names, которых нет в множестве'''
+        found = set()
+        for chunk in chunked(names, SQLITE_CHUNK):
+            marks = ','.join('?' * len(chunk))
+            found.update(row[0] for row in self.db.execute(
+                f'SELECT name FROM names WHERE name IN ({marks})', chunk))
+        return [name for name in names if name not in found]
+
+    def __len__(self):
+        return self.db.execute('SELECT count(*) FROM names').fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+
+def thumbnail_names(sources):
+    '''Имена миниатюр, собранных из sources, по записям kvstore'''
+    storage = default.storage
+    keys = [add_prefix(ImageFile(name, storage).key, 'thumbnails')
+            for name in sources]
+    thumbnail_keys = []
+    for value in KVStoreModel.objects.filter(
+            key__in=keys).values_list('value', flat=True).iterator():
+        thumbnail_keys += [add_prefix(key) for key in deserialize(value)]
+    names = []
+    for chunk in chunked(thumbnail_keys, SQLITE_CHUNK):
+        names += [deserialize_image_file(value).name
+                  for value in KVStoreModel.objects.filter(
+                      key__in=chunk).values_list('value', flat=True)]
+    return names
+
+
+def referenced(batch_size):
+    '''Пачки имён файлов, на которые ссылается база'''
+    for queryset in (Post.all_objects.all(), ArchivedPost.objects.all()):
+        names = queryset.exclude(image='').order_by().values_list(
+            'image', flat=True)
+        batch = []
+        for name in names.iterator(chunk_size=batch_size):
+            batch.append(name)
+            if len(batch) >= batch_size:
+                yield batch + [original_name(name) for name in batch]
+                yield thumbnail_names(batch)
+                batch = []
+        if batch:
+            yield batch + [original_name(name) for name in batch]
+            yield thumbnail_names(batch)
+
+
+class Walker:
+    '''Обход дерева в несколько потоков через os.scandir.
+
+    Найденные файлы отдаются пачками (путь, размер, mtime). Очередь
+    пачек ограничена, поэтому потоки не убегают вперёд удаления, а
+    большой каталог отдаётся частями по мере чтения.
+    '''
+
+    def __init__(self, workers, batch_size, skip=()):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.skip = set(skip)
+        self.directories = queue.Queue()
+        self.batches = queue.Queue(maxsize=workers * 4)
+        self.lock = threading.Lock()
+        self.pending = 0
+
+    def add_directory(self, path):
+        with self.lock:
+            self.pending += 1
+        self.directories.put(path)
+
+    def entry(self, entry, batch):
+        if entry.is_dir(follow_symlinks=False):
+            if entry.path not in self.skip:
+                self.add_directory(entry.path)
+        elif entry.is_file(follow_symlinks=False):
+            stat = entry.stat(follow_symlinks=False)
+            batch.append((entry.path, stat.st_size, stat.st_mtime))
+
+    def scan(self, path):
+        batch = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    self.entry(entry, batch)
+                except FileNotFoundError:
+                    continue
+                if len(batch) >= self.batch_size:
+                    self.batches.put(batch)
+                    batch = []
+        if batch:
+            self.batches.put(batch)
+
+    def work(self):
+        while True:
+            path = self.directories.get()
+            if path is None:
+                return
+            try:
+                self.scan(path)
+            except OSError as error:
+                logger.warning('Cannot scan %s: %s', path, error)
+            with self.lock:
+                self.pending -= 1
+                finished = not self.pending
+            if finished:
+                self.batches.put(None)
+
+    def __call__(self, root):
+        self.add_directory(root)
+        threads = [threading.Thread(target=self.work, daemon=True)
+                   for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                batch = self.batches.get()
+                if batch is None:
+                    return
+                yield batch
+        finally:
+            for _ in threads:
+                self.directories.put(None)
+
+
+class Collector:
+    '''Удаляет из MEDIA_ROOT файлы, которых нет в ReferencedSet'''
+
+    def __init__(self, refs, root=None, workers=8, batch_size=1000,
+                 min_age=None, dry_run=False):
+        self.refs = refs
+        self.root = root or settings.MEDIA_ROOT
+        self.workers = workers
+        self.batch_size = batch_size
+        self.min_age = (settings.MEDIA_GC_MIN_AGE if min_age is None
+                        else min_age)
+        self.dry_run = dry_run
+        self.scanned = self.orphaned = self.removed = self.freed = 0
+
+    def fill(self):
+        for names in referenced(self.batch_size):
+            self.refs.add_many(names)
+        return len(self.refs)
+
+    def name(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def old(self, batch):
+        self.scanned += len(batch)
+        young = time.time() - self.min_age
+        return [(path, size) for path, size, mtime in batch if mtime < young]
+
+    def remove(self, orphans):
+        self.orphaned += len(orphans)
+        for path, size in orphans:
+            if self.dry_run:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self.removed += 1
+            self.freed += size
+        return [path for path, _ in orphans]
+
+    def sweep(self, batch):
+        '''Проверяет и чистит одну пачку; возвращает лишние пути'''
+        files = {self.name(path): (path, size)
+                 for path, size in self.old(batch)}
+        return self.remove([files[name]
+                            for name in self.refs.missing(list(files))])
+
+    def run(self):
+        '''Генератор: после каждой пачки отдаёт список лишних путей'''
+        uploads = os.path.abspath(upload_dir())
+        if os.path.isdir(self.root):
+            walker = Walker(self.workers, self.batch_size, {uploads})
+            for batch in walker(os.path.abspath(self.root)):
+                yield self.sweep(batch)
+        if os.path.isdir(uploads):
+            walker = Walker(self.workers, self.batch_size)
+            for batch in walker(uploads):
+                yield self.remove(self.old(batch))
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 15:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_auto_20261019_1517'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('post', 'Пост'), ('group', 'Группа'), ('author', 'Автор')], max_length=6, verbose_name='Объект')),
+                ('object_id', models.PositiveIntegerField(verbose_name='ID объекта')),
+                ('bucket', models.DateTimeField(db_index=True, verbose_name='Начало интервала')),
+                ('comments', models.PositiveIntegerField(default=0, verbose_name='Комментарии')),
+                ('follows', models.PositiveIntegerField(default=0, verbose_name='Подписки')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='Просмотры')),
+            ],
+            options={
+                'verbose_name': 'Активность',
+                'verbose_name_plural': 'Активность',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='activitybucket',
+            constraint=models.UniqueConstraint(fields=('target', 'object_id', 'bucket'), name='unique_activity_bucket'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 2.2.16 on 2026-10-19 15:50
+
+from django.conf import settings
+from django.db import migrations, models
+from django.template.defaultfilters import linebreaks_filter
+from django.utils.text import Truncator
+
+BATCH_SIZE = 500
+
+
+def render_texts(apps, schema_editor):
+    for name, fields in (('Post', ('excerpt', 'text_html')),
+                         ('ArchivedPost', ('text_html',))):
+        model = apps.get_model('posts', name)
+        last = 0
+        while True:
+            batch = list(model._base_manager.filter(pk__gt=last).order_by(
+                'pk').only('pk', 'text')[:BATCH_SIZE])
+            if not batch:
+                break
+            for obj in batch:
+                obj.excerpt = Truncator(obj.text).chars(
+                    settings.POST_EXCERPT_LENGTH)
+                obj.text_html = linebreaks_filter(obj.text, autoescape=True)
+            model._base_manager.bulk_update(batch, fields)
+            last = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='text_html',
+            field=models.TextField(blank=True, verbose_name='Текст в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(render_texts, migrations.RunPython.noop),
+    ]
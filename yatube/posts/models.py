@@ -6,6 +6,13 @@ from django.db import models
 User = get_user_model()
 
 
+class LiveManager(models.Manager):
+    '''Записи без отметки об удалении'''
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class Post(CreatedModel):
     text = models.TextField(verbose_name='Текст поста',
                             help_text='Введите текст поста')
@@ -24,10 +31,31 @@ class Post(CreatedModel):
                               upload_to='posts/',
                               blank=True,
                               help_text='Картинка')
+    views = models.PositiveIntegerField(verbose_name='Просмотры',
+                                        default=0,
+                                        editable=False)
+    is_deleted = models.BooleanField(verbose_name='Удалён',
+                                     default=False,
+                                     editable=False)
+    excerpt = models.TextField(verbose_name='Начало текста',
+                               blank=True,
+                               editable=False)
+    text_html = models.TextField(verbose_name='Текст в HTML',
+                                 blank=True,
+                                 editable=False)
+
+    objects = LiveManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.text[:settings.LEN_OF_POSTS]
 
+    def save(self, *args, update_fields=None, **kwargs):
+        # excerpt и text_html пересчитываются из text в pre_save
+        if update_fields is not None and 'text' in update_fields:
+            update_fields = {*update_fields, 'excerpt', 'text_html'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
@@ -68,6 +96,12 @@ class Comment(CreatedModel):
                                verbose_name='Автор')
     text = models.TextField(verbose_name='Комментарий',
                             help_text='Напишите комментарий')
+    is_deleted = models.BooleanField(verbose_name='Удалён',
+                                     default=False,
+                                     editable=False)
+
+    objects = LiveManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ('-pub_date',)
@@ -87,3 +121,108 @@ class Follow(models.Model):
         verbose_name_plural = 'Лента авторов'
         constraints = [models.UniqueConstraint(
             fields=['user', 'author'], name='unique_members')]
+
+
+class UserPurge(models.Model):
+    '''Отметка: пользователь удалён, его данные ждут очистки'''
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                related_name='purge',
+                                verbose_name='Пользователь')
+    requested = models.DateTimeField('Запрошено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Удаление пользователя'
+        verbose_name_plural = 'Удаление пользователей'
+        ordering = ('requested',)
+
+
+class Recommendation(models.Model):
+    user = models.ForeignKey(User, related_name='recommendations',
+                             on_delete=models.CASCADE)
+    author = models.ForeignKey(User, related_name='+',
+                               on_delete=models.CASCADE,
+                               verbose_name='Автор')
+    score = models.FloatField('Оценка')
+    rank = models.PositiveSmallIntegerField('Место')
+
+    class Meta:
+        ordering = ('user', 'rank')
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'rank'], name='unique_recommendation_rank')]
+
+
+class ActivityBucket(models.Model):
+    '''Счётчики активности объекта за один интервал времени'''
+    POST = 'post'
+    GROUP = 'group'
+    AUTHOR = 'author'
+    TARGET_CHOICES = ((POST, 'Пост'), (GROUP, 'Группа'), (AUTHOR, 'Автор'))
+
+    target = models.CharField('Объект', max_length=6,
+                              choices=TARGET_CHOICES)
+    object_id = models.PositiveIntegerField('ID объекта')
+    bucket = models.DateTimeField('Начало интервала', db_index=True)
+    comments = models.PositiveIntegerField('Комментарии', default=0)
+    follows = models.PositiveIntegerField('Подписки', default=0)
+    views = models.PositiveIntegerField('Просмотры', default=0)
+
+    class Meta:
+        verbose_name = 'Активность'
+        verbose_name_plural = 'Активность'
+        constraints = [models.UniqueConstraint(
+            fields=['target', 'object_id', 'bucket'],
+            name='unique_activity_bucket')]
+
+
+class ArchivedPost(models.Model):
+    '''Старый пост, перенесённый из горячей таблицы; id сохраняется'''
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(verbose_name='Текст поста')
+    group = models.ForeignKey('Group',
+                              blank=True,
+                              null=True,
+                              on_delete=models.SET_NULL,
+                              related_name='+',
+                              verbose_name='Группа')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='+',
+                               verbose_name='Автор')
+    image = models.ImageField(verbose_name='Картинка',
+                              upload_to='posts/',
+                              blank=True)
+    views = models.PositiveIntegerField(verbose_name='Просмотры',
+                                        default=0)
+    text_html = models.TextField(verbose_name='Текст в HTML', blank=True)
+    pub_date = models.DateTimeField('Дата публикации')
+    archived = models.DateTimeField('Перенесён в архив',
+                                    auto_now_add=True)
+
+    def __str__(self):
+        return self.text[:settings.LEN_OF_POSTS]
+
+    class Meta:
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архив постов'
+        ordering = ('-pub_date',)
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey('ArchivedPost',
+                             on_delete=models.CASCADE,
+                             related_name='comments',
+                             verbose_name='Пост')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='+',
+                               verbose_name='Автор')
+    text = models.TextField(verbose_name='Комментарий')
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архив комментариев'
@@ -0,0 +1,133 @@
+'''Мягкое удаление и фоновая очистка.
+
+Удаление поста, комментария или пользователя только ставит отметку:
+is_deleted для записей, is_active=False и UserPurge для пользователя.
+Менеджер по умолчанию скрывает отмеченные записи сразу. Команда
+purge_deleted потом удаляет строки пачками по PURGE_BATCH_SIZE, каждая
+в своей транзакции, и убирает картинки вместе с миниатюрами, так что
+ни один запрос не держит долгую блокировку записи. Зависимые строки
+(чужие комментарии, уведомления, рекомендации) уходят такими же
+пачками раньше родительских, чтобы каскад не разрастался.
+'''
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from sorl.thumbnail import delete as delete_image
+
+from core.pagecache import invalidate
+
+from . import signals
+from .models import Comment, Post, UserPurge
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+def soft_delete_posts(queryset):
+    '''Скрывает посты и сбрасывает кеши страниц и лент'''
+    with transaction.atomic():
+        posts = list(queryset.filter(is_deleted=False).values(
+            'id', 'author_id', 'group_id'))
+        Post.all_objects.filter(
+            pk__in=[post['id'] for post in posts]).update(is_deleted=True)
+        if posts:
+            signals.forget_posts(posts)
+    return len(posts)
+
+
+def soft_delete_comments(queryset):
+    with transaction.atomic():
+        post_ids = set(queryset.values_list('post_id', flat=True))
+        count = queryset.update(is_deleted=True)
+        invalidate(*[f'post:{post_id}' for post_id in post_ids])
+    return count
+
+
+def soft_delete_user(user):
+    '''Блокирует пользователя и скрывает всё, что он написал'''
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        UserPurge.objects.get_or_create(user=user)
+        soft_delete_posts(Post.all_objects.filter(author=user))
+        soft_delete_comments(Comment.all_objects.filter(author=user,
+                                                        is_deleted=False))
+
+
+def _delete_files(names):
+    for name in names:
+        try:
+            # Удаляет миниатюры, их записи в kvstore и сам файл
+            delete_image(name)
+        except OSError as error:
+            logger.warning('Cannot delete %s: %s', name, error)
+
+
+def cascades(model, skip=()):
+    '''Обратные связи, по которым удаление model уносит чужие строки.
+
+    Скрытые связи (related_name='+') тоже учитываются: именно через них
+    уходят рекомендации, события и уведомления пользователя.
+    '''
+    fields = model._meta.get_fields(include_hidden=True)
+    return [relation for relation in fields
+            if relation.auto_created and not relation.concrete
+            and (relation.one_to_many or relation.one_to_one)
+            and relation.on_delete is models.CASCADE
+            and relation.related_model not in skip]
+
+
+def purge_dependents(model, ids, batch_size, skip=()):
+    '''Пачка строк, которые каскадно удалились бы вместе с ids'''
+    for relation in cascades(model, skip):
+        dependent = relation.related_model
+        done = purge_rows(dependent._base_manager.filter(
+            **{f'{relation.field.name}__in': ids}), batch_size)
+        if done:
+            return done
+    return 0
+
+
+def purge_rows(queryset, batch_size, skip=()):
+    '''Удаляет пачку строк из queryset вместе с их картинками.
+
+    Пока у строк есть зависимые по CASCADE, за вызов удаляется пачка
+    зависимых, а сами строки ждут следующего вызова: каскад при их
+    удалении остаётся пустым, и транзакция не растёт с размером данных.
+    '''
+    model = queryset.model
+    ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return 0
+    done = purge_dependents(model, ids, batch_size, skip)
+    if done:
+        return done
+    with transaction.atomic():
+        rows = model._base_manager.filter(pk__in=ids)
+        names = []
+        if any(field.name == 'image' for field in model._meta.fields):
+            names = [name for name in rows.values_list('image', flat=True)
+                     if name]
+        with signals.muted():
+            rows.delete()
+    _delete_files(names)
+    return len(ids)
+
+
+def purge(batch_size=None):
+    '''Одна пачка работы; возвращает число удалённых строк'''
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    done = purge_rows(Post.all_objects.filter(is_deleted=True), batch_size)
+    done += purge_rows(Comment.all_objects.filter(is_deleted=True),
+                       batch_size)
+    if done:
+        return done
+    for user_purge in UserPurge.objects.all():
+        # Отметка уходит последней, вместе с самим пользователем
+        users = User.objects.filter(pk=user_purge.user_id)
+        done = purge_rows(users, batch_size, skip=(UserPurge,))
+        if done:
+            return done
+    return 0
@@ -0,0 +1,125 @@
+'''Офлайн-расчёт рекомендаций «на кого подписаться».
+
+Граф подписок загружается один раз в компактные массивы смежности
+(CSR: offsets + targets на array('l')), после чего для каждого
+пользователя считаются «друзья друзей» и совместные подписки.
+'''
+import heapq
+from array import array
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Follow, Recommendation
+
+FRIENDS_OF_FRIENDS_WEIGHT = 1.0
+CO_FOLLOW_WEIGHT = 0.5
+POPULAR_WEIGHT = 0.01
+# Сколько подписчиков одного автора учитывать в совместных подписках
+MAX_CO_FOLLOWERS = 200
+
+
+class FollowGraph:
+    '''Граф подписок в виде двух CSR-структур на плотных индексах'''
+
+    def __init__(self, edges):
+        edges = sorted(edges)
+        nodes = sorted({node for edge in edges for node in edge})
+        self.ids = array('l', nodes)
+        self.index = {node: i for i, node in enumerate(nodes)}
+        self.following = self._csr(
+            (self.index[user], self.index[author]) for user, author in edges)
+        self.followers = self._csr(sorted(
+            (self.index[author], self.index[user])
+            for user, author in edges))
+
+    def _csr(self, pairs):
+        offsets = array('l', [0]) * (len(self.ids) + 1)
+        targets = array('l')
+        for source, target in pairs:
+            offsets[source + 1] += 1
+            targets.append(target)
+        for i in range(len(self.ids)):
+            offsets[i + 1] += offsets[i]
+        return offsets, targets
+
+    @staticmethod
+    def _row(csr, node):
+        offsets, targets = csr
+        return targets[offsets[node]:offsets[node + 1]]
+
+    def followed_by(self, node):
+        return self._row(self.following, node)
+
+    def followers_of(self, node):
+        return self._row(self.followers, node)
+
+    @classmethod
+    def load(cls):
+        return cls(Follow.objects.filter(
+            user__is_active=True, author__is_active=True
+        ).values_list('user_id', 'author_id').iterator())
+
+
+def popular_authors(graph, limit):
+    offsets = graph.followers[0]
+    return heapq.nlargest(
+        limit, range(len(graph.ids)),
+        key=lambda node: offsets[node + 1] - offsets[node])
+
+
+def recommend(graph, node, top_k, popular=()):
+    '''Top-K (индекс автора, оценка) для одного пользователя'''
+    followed = set(graph.followed_by(node))
+    scores = Counter()
+    for author in followed:
+        for candidate in graph.followed_by(author):
+            scores[candidate] += FRIENDS_OF_FRIENDS_WEIGHT
+        co_followers = graph.followers_of(author)[:MAX_CO_FOLLOWERS]
+        weight = CO_FOLLOW_WEIGHT / len(co_followers)
+        for other in co_followers:
+            if other != node:
+                for candidate in graph.followed_by(other):
+                    scores[candidate] += weight
+    for place, candidate in enumerate(popular):
+        scores[candidate] += POPULAR_WEIGHT / (place + 1)
+    for excluded in followed | {node}:
+        scores.pop(excluded, None)
+    return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+def rebuild(top_k=None, batch_size=500):
+    '''Пересчитывает рекомендации для всех пользователей графа'''
+    top_k = top_k or settings.RECOMMENDATIONS_TOP_K
+    graph = FollowGraph.load()
+    popular = popular_authors(graph, top_k)
+    total = 0
+    for start in range(0, len(graph.ids), batch_size):
+        nodes = range(start, min(start + batch_size, len(graph.ids)))
+        rows = [Recommendation(user_id=graph.ids[node],
+                               author_id=graph.ids[author],
+                               score=score,
+                               rank=rank)
+                for node in nodes
+                for rank, (author, score) in enumerate(
+                    recommend(graph, node, top_k, popular))]
+        with transaction.atomic():
+            Recommendation.objects.filter(
+                user_id__in=[graph.ids[node] for node in nodes]).delete()
+            Recommendation.objects.bulk_create(rows)
+        total += len(rows)
+    stale = list(set(Recommendation.objects.values_list(
+        'user_id', flat=True).distinct()) - set(graph.ids))
+    for start in range(0, len(stale), batch_size):
+        Recommendation.objects.filter(
+            user_id__in=stale[start:start + batch_size]).delete()
+    return total
+
+
+def suggestions_for(user):
+    '''Рекомендации пользователя одним запросом по индексу'''
+    if not user.is_authenticated:
+        return []
+    return (Recommendation.objects.filter(user=user)
+            .select_related('author')[:settings.RECOMMENDATIONS_TOP_K])
@@ -0,0 +1,28 @@
+'''Текст поста, подготовленный при сохранении.
+
+excerpt — начало текста для лент, text_html — текст после linebreaks для
+страницы поста. Оба считаются один раз в pre_save (или перед
+bulk_create), поэтому шаблоны не прогоняют длинный текст через фильтры
+на каждом просмотре, а ленты не тянут из базы полный текст.
+'''
+from django.conf import settings
+from django.template.defaultfilters import linebreaks_filter
+from django.utils.text import Truncator
+
+# Поля, которые ленты не читают
+FEED_DEFERRED = ('text', 'text_html')
+
+
+def excerpt(text):
+    return Truncator(text).chars(settings.POST_EXCERPT_LENGTH)
+
+
+def text_html(text):
+    return linebreaks_filter(text, autoescape=True)
+
+
+def render_post(post):
+    '''Заполняет excerpt и text_html по текущему тексту'''
+    post.excerpt = excerpt(post.text)
+    post.text_html = text_html(post.text)
+    return post
@@ -0,0 +1,184 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.db import post_bulk_create
+from core.images import keep_original, normalize_upload
+from core.pagecache import invalidate
+
+from . import feeds, following, trending
+from .models import Comment, Follow, Group, Post, User
+from .rendering import render_post
+
+_state = threading.local()
+# Поля группы, которые попадают в её ленту
+GROUP_FEED_FIELDS = ('slug', 'title', 'description')
+
+
+@contextmanager
+def muted():
+    '''Отключает обработчики постов и комментариев внутри блока.
+
+    Для массовых операций, которые сами сбрасывают кеши один раз.
+    '''
+    _state.muted = True
+    try:
+        yield
+    finally:
+        _state.muted = False
+
+
+def is_muted():
+    return getattr(_state, 'muted', False)
+
+
+def forget_posts(posts):
+    '''Один сброс кешей на пачку постов вместо обработчика на каждый.
+
+    posts — словари с id, author_id и group_id.
+    '''
+    author_ids = {post['author_id'] for post in posts}
+    group_ids = {post['group_id'] for post in posts} - {None}
+    slugs = list(Group.objects.filter(
+        pk__in=group_ids).values_list('slug', flat=True))
+    usernames = list(User.objects.filter(
+        pk__in=author_ids).values_list('username', flat=True))
+    invalidate('feed',
+               *[f'post:{post["id"]}' for post in posts],
+               *[f'author:{author_id}' for author_id in author_ids],
+               *[f'group:{slug}' for slug in slugs])
+    stale = [('index', None)]
+    stale += [('profile', username) for username in usernames]
+    stale += [('group', slug) for slug in slugs]
+    transaction.on_commit(lambda: feeds.mark_dirty(*stale))
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    instance.previous_group_id = None
+    if instance.pk:
+        instance.previous_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Post)
+def render_text(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'text' in update_fields:
+        render_post(instance)
+
+
+@receiver(pre_save, sender=Post)
+def normalize_image(sender, instance, **kwargs):
+    if instance.image and not instance.image._committed:
+        normalize_upload(instance.image)
+
+
+@receiver(post_save, sender=Post)
+def save_original(sender, instance, **kwargs):
+    if instance.image:
+        keep_original(instance.image)
+
+
+@receiver((post_save, post_delete), sender=Post)
+def post_changed(sender, instance, **kwargs):
+    if is_muted():
+        return
+    tags = ['feed', f'post:{instance.pk}', f'author:{instance.author_id}']
+    if instance.group_id:
+        tags.append(f'group:{instance.group.slug}')
+    invalidate(*tags)
+    group_ids = {instance.group_id,
+                 getattr(instance, 'previous_group_id', None)} - {None}
+    stale = [('index', None), ('profile', instance.author.username)]
+    stale += [('group', slug) for slug in Group.objects.filter(
+        pk__in=group_ids).values_list('slug', flat=True)]
+    transaction.on_commit(lambda: feeds.mark_dirty(*stale))
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    if is_muted():
+        return
+    invalidate(f'post:{instance.post_id}')
+    if kwargs.get('created') and instance.post_id:
+        trending.record_comment(instance)
+
+
+@receiver((post_save, post_delete), sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    invalidate(f'author:{instance.author_id}', f'author:{instance.user_id}')
+    following.invalidate(instance.user_id)
+    if kwargs.get('created'):
+        trending.record_follow(instance)
+
+
+def _previous(model, instance, update_fields, *names):
+    '''Прежние значения полей до сохранения или None для новой строки'''
+    if not instance.pk or (update_fields is not None
+                           and not set(names) & set(update_fields)):
+        return None
+    return model.objects.filter(pk=instance.pk).values(*names).first()
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_fields(sender, instance, update_fields=None, **kwargs):
+    instance.previous_values = _previous(Group, instance, update_fields,
+                                         *GROUP_FEED_FIELDS)
+
+
+@receiver((post_save, post_delete), sender=Group)
+def group_changed(sender, instance, signal, **kwargs):
+    previous = getattr(instance, 'previous_values', None) or {}
+    slugs = {instance.slug, previous.get('slug', instance.slug)}
+    invalidate(*[f'group:{slug}' for slug in slugs])
+    current = {name: getattr(instance, name) for name in GROUP_FEED_FIELDS}
+    if signal is post_delete or previous and previous != current:
+        stale = [('group', slug) for slug in slugs]
+        transaction.on_commit(lambda: feeds.mark_dirty(*stale))
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, update_fields=None, **kwargs):
+    instance.previous_values = _previous(User, instance, update_fields,
+                                         'username')
+
+
+@receiver(post_save, sender=User)
+def username_changed(sender, instance, **kwargs):
+    '''Имя автора есть в его ленте и в каждом элементе других лент'''
+    previous = getattr(instance, 'previous_values', None)
+    if not previous or previous['username'] == instance.username:
+        return
+    invalidate('feed', f'author:{instance.pk}')
+    stale = [('index', None), ('profile', previous['username']),
+             ('profile', instance.username)]
+    stale += [('group', slug) for slug in Group.objects.filter(
+        posts__author=instance).distinct().values_list('slug', flat=True)]
+    transaction.on_commit(lambda: feeds.mark_dirty(*stale))
+
+
+@receiver(post_bulk_create, sender=Post)
+def posts_bulk_created(sender, instances, **kwargs):
+    forget_posts([{'id': post.pk, 'author_id': post.author_id,
+                   'group_id': post.group_id} for post in instances])
+
+
+@receiver(post_bulk_create, sender=Comment)
+def comments_bulk_created(sender, instances, **kwargs):
+    invalidate(*{f'post:{comment.post_id}' for comment in instances})
+    for comment in instances:
+        trending.record_comment(comment)
+
+
+@receiver(post_bulk_create, sender=Follow)
+def follows_bulk_created(sender, instances, **kwargs):
+    invalidate(*{tag for follow in instances
+                 for tag in (f'author:{follow.author_id}',
+                             f'author:{follow.user_id}')})
+    for user_id in {follow.user_id for follow in instances}:
+        following.invalidate(user_id)
+    for follow in instances:
+        trending.record_follow(follow)
@@ -0,0 +1,72 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.archive import archive, cutoff
+from posts.models import ArchivedComment, ArchivedPost, Comment, Group, Post
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.old = Post.objects.create(text='Старый пост', author=self.user,
+                                       group=self.group)
+        self.fresh = Post.objects.create(text='Новый пост',
+                                         author=self.user)
+        Post.objects.filter(pk=self.old.pk).update(
+            pub_date=timezone.now() - timedelta(days=1000), views=7)
+        Comment.objects.create(post=self.old, author=self.user,
+                               text='Старый комментарий')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_old_posts_move_to_archive(self):
+        '''Старые посты и комментарии переезжают с теми же id'''
+        self.assertEqual(archive(cutoff(365), batch_size=1), (1, 1))
+        self.assertFalse(Post.objects.filter(pk=self.old.pk).exists())
+        self.assertTrue(Post.objects.filter(pk=self.fresh.pk).exists())
+        archived = ArchivedPost.objects.get(pk=self.old.pk)
+        self.assertEqual((archived.text, archived.views, archived.group),
+                         ('Старый пост', 7, self.group))
+        self.assertEqual(ArchivedComment.objects.get().post, archived)
+        self.assertEqual(archive(cutoff(365)), (0, 0))
+
+    def test_post_detail_falls_back_to_archive(self):
+        '''Архивный пост открывается по старому адресу, но только на чтение'''
+        archive(cutoff(365))
+        url = reverse('posts:post_detail', kwargs={'post_id': self.old.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertContains(response, 'Старый комментарий')
+        self.assertNotContains(response, reverse(
+            'posts:post_edit', kwargs={'post_id': self.old.pk}))
+        response = self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.old.pk}),
+            {'text': 'Новый'})
+        self.assertEqual(response.status_code, 404)
+        missing = reverse('posts:post_detail', kwargs={'post_id': 10 ** 6})
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_feeds_show_only_hot_posts(self):
+        self.client.get(reverse('posts:index'))
+        call_command('archive_posts', days=365, stdout=StringIO())
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(list(response.context['page_obj']), [self.fresh])
+
+    def test_dry_run_keeps_posts(self):
+        out = StringIO()
+        call_command('archive_posts', days=365, dry_run=True, stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertFalse(ArchivedPost.objects.exists())
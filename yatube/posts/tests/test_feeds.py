@@ -0,0 +1,150 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from .. import feeds
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(title='Тестовая группа',
+                                          slug='test_group')
+        self.post = Post.objects.create(text='Тестовый текст',
+                                        group=self.group,
+                                        author=self.user)
+        self.feeds = {
+            reverse('posts:index_feed'): 'application/rss+xml',
+            reverse('posts:index_atom'): 'application/atom+xml',
+            reverse('posts:group_feed',
+                    kwargs={'slug': 'test_group'}): 'application/rss+xml',
+            reverse('posts:profile_atom',
+                    kwargs={'username': 'auth'}): 'application/atom+xml'}
+
+    def test_feeds_contain_posts(self):
+        '''Ленты отдаются в нужном формате и содержат посты'''
+        for url, content_type in self.feeds.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertTrue(
+                    response['Content-Type'].startswith(content_type))
+                self.assertIn('Тестовый текст', response.content.decode())
+
+    def test_conditional_requests(self):
+        '''ETag и Last-Modified позволяют получить 304'''
+        url = reverse('posts:index_feed')
+        response = self.guest_client.get(url)
+        conditions = ({'HTTP_IF_NONE_MATCH': response['ETag']},
+                      {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']})
+        for headers in conditions:
+            with self.subTest(headers=headers):
+                response = self.guest_client.get(url, **headers)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+
+    @override_settings(SITE_URL='https://yatube.example')
+    def test_links_use_site_url(self):
+        '''Ссылки в ленте строятся от SITE_URL, а не от хоста запроса'''
+        response = self.guest_client.get(reverse('posts:index_feed'))
+        content = response.content.decode()
+        self.assertIn(f'https://yatube.example/posts/{self.post.pk}/',
+                      content)
+        self.assertNotIn('testserver', content)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': 'local'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                   'LOCATION': 'shared'}}, FEED_CACHE_TIMEOUT=60)
+    def test_snapshot_is_shared_and_expires(self):
+        '''Снимок ленты пишется в общий кеш с конечным сроком'''
+        shared = caches['shared']
+        with mock.patch.object(shared, 'set', wraps=shared.set) as cache_set:
+            feeds.render('index', 'rss')
+        self.assertEqual(cache_set.call_args[0][2], 60)
+        self.assertIsNotNone(shared.get(feeds._cache_key('index', 'rss',
+                                                         None)))
+        self.assertIsNone(caches['default'].get(
+            feeds._cache_key('index', 'rss', None)))
+
+    def test_unknown_group_feed(self):
+        '''Лента несуществующей группы — 404'''
+        response = self.guest_client.get(
+            reverse('posts:group_feed', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class FeedPrerenderTest(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        feeds.dirty.reset()
+        self.user = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(title='Группа', slug='group')
+
+    def assertCached(self, url, text):
+        with self.assertNumQueries(0):
+            response = Client().get(url)
+        self.assertIn(text, response.content.decode())
+
+    def test_feeds_rebuilt_on_post_save(self):
+        '''Сохранение поста пересобирает ленты заранее'''
+        Client().get(reverse('posts:index_feed'))
+        Post.objects.create(text='Свежий пост', author=self.user,
+                            group=self.group)
+        feeds.dirty.flush()
+        urls = (reverse('posts:index_feed'),
+                reverse('posts:group_atom', kwargs={'slug': 'group'}),
+                reverse('posts:profile_feed', kwargs={'username': 'auth'}))
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertCached(url, 'Свежий пост')
+
+    def test_saves_are_debounced(self):
+        '''Серия сохранений собирает каждую ленту один раз'''
+        for number in range(3):
+            Post.objects.create(text=f'Пост {number}', author=self.user,
+                                group=self.group)
+        with mock.patch.object(feeds, 'render') as render:
+            feeds.dirty.flush()
+        # index, группа и автор — в двух форматах
+        self.assertEqual(render.call_count, 6)
+
+    def test_group_rename_rebuilds_feed(self):
+        '''Новый адрес и название группы попадают в ленту'''
+        old_url = reverse('posts:group_feed', kwargs={'slug': 'group'})
+        Client().get(old_url)
+        self.group.slug = 'renamed'
+        self.group.title = 'Новое название'
+        self.group.save()
+        feeds.dirty.flush()
+        self.assertEqual(Client().get(old_url).status_code,
+                         HTTPStatus.NOT_FOUND)
+        self.assertCached(
+            reverse('posts:group_feed', kwargs={'slug': 'renamed'}),
+            'Новое название')
+
+    def test_username_change_rebuilds_feeds(self):
+        '''Новое имя автора попадает во все ленты с его постами'''
+        Post.objects.create(text='Пост', author=self.user, group=self.group)
+        feeds.dirty.flush()
+        self.user.username = 'renamed'
+        self.user.save()
+        feeds.dirty.flush()
+        urls = (reverse('posts:index_feed'),
+                reverse('posts:group_feed', kwargs={'slug': 'group'}),
+                reverse('posts:profile_feed', kwargs={'username': 'renamed'}))
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertCached(url, 'renamed')
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.template import engines
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.following import followed_ids, following_many, is_following
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class FollowingCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader')
+        self.authors = [User.objects.create_user(username=f'author{number}')
+                        for number in range(4)]
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def follow(self, author):
+        self.client.get(reverse('posts:profile_follow',
+                                kwargs={'username': author.username}))
+
+    def test_membership_is_cached_and_invalidated(self):
+        '''Проверка подписки идёт из кеша и сбрасывается при отписке'''
+        for author in self.authors[2:0:-1]:
+            self.follow(author)
+        self.assertEqual(list(followed_ids(self.user.pk)),
+                         sorted(author.pk for author in self.authors[1:3]))
+        with self.assertNumQueries(0):
+            self.assertTrue(is_following(self.user, self.authors[1].pk))
+            self.assertFalse(is_following(self.user, self.authors[0].pk))
+            self.assertEqual(
+                following_many(self.user,
+                               [author.pk for author in self.authors]),
+                {self.authors[1].pk, self.authors[2].pk})
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': self.authors[1]}))
+        self.assertFalse(is_following(self.user, self.authors[1].pk))
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': 'local'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                   'LOCATION': 'shared'}})
+    def test_state_lives_in_shared_cache(self):
+        '''Подписки лежат в общем кеше, и подписка сбрасывает их там'''
+        followed_ids(self.user.pk)
+        key = f'following:{self.user.pk}'
+        self.assertIsNotNone(caches['shared'].get(key))
+        self.assertIsNone(caches['default'].get(key))
+        self.follow(self.authors[0])
+        self.assertIsNone(caches['shared'].get(key))
+
+    def test_followed_authors_tag(self):
+        '''Тег отдаёт авторов страницы, на которых есть подписка'''
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        posts = [Post.objects.create(author=author, text='Текст')
+                 for author in self.authors[:2]]
+        request = RequestFactory().get('/')
+        request.user = self.user
+        html = engines['django'].from_string(
+            '{% load following %}{% followed_authors posts as followed %}'
+            '{% for post in posts %}'
+            '{% if post.author_id in followed %}+{% else %}-{% endif %}'
+            '{% endfor %}').render({'posts': posts}, request)
+        self.assertEqual(html, '+-')
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default, get_thumbnail
+
+from core.uploads import upload_dir
+
+from ..media_gc import Collector, ReferencedSet
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00\x01\x00\x80\x00\x00\x00'
+             b'\x00\x00\xFF\xFF\xFF\x21\xF9\x04\x00\x00\x00\x00\x00\x2C'
+             b'\x00\x00\x00\x00\x02\x00\x01\x00\x00\x02\x02\x0C\x0A\x00'
+             b'\x3B')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaGCTests(TestCase):
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        os.makedirs(TEMP_MEDIA_ROOT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        default.kvstore.clear()
+        self.user = User.objects.create_user(username='author')
+        self.post = Post.objects.create(
+            text='Пост', author=self.user,
+            image=SimpleUploadedFile('kept.gif', SMALL_GIF, 'image/gif'))
+        self.thumbnail = get_thumbnail(self.post.image, '10x10').name
+        self.orphan = self.write('posts/orphan.gif')
+        self.stale_thumbnail = self.write('cache/00/aa/stale.jpg')
+        self.fresh = self.write('posts/fresh.gif', age=0)
+        self.age(self.post.image.name, self.thumbnail)
+
+    def write(self, name, age=3600):
+        path = os.path.join(TEMP_MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(SMALL_GIF)
+        self.age(name, seconds=age)
+        return path
+
+    def age(self, *names, seconds=3600):
+        moment = time.time() - seconds
+        for name in names:
+            os.utime(os.path.join(TEMP_MEDIA_ROOT, name), (moment, moment))
+
+    def collect(self, **options):
+        refs = ReferencedSet(':memory:')
+        collector = Collector(refs, workers=3, batch_size=2, min_age=60,
+                              **options)
+        collector.fill()
+        orphans = [path for batch in collector.run() for path in batch]
+        refs.close()
+        return collector, orphans
+
+    def test_unreferenced_old_files_are_removed(self):
+        '''Удаляются только старые файлы без ссылок из базы'''
+        collector, orphans = self.collect()
+        self.assertCountEqual(orphans, [self.orphan, self.stale_thumbnail])
+        self.assertEqual((collector.scanned, collector.removed), (5, 2))
+        self.assertFalse(os.path.exists(self.orphan))
+        self.assertTrue(os.path.exists(self.fresh))
+        self.assertTrue(os.path.exists(self.post.image.path))
+        self.assertTrue(os.path.exists(
+            os.path.join(TEMP_MEDIA_ROOT, self.thumbnail)))
+
+    def test_dry_run_keeps_files(self):
+        out, err = StringIO(), StringIO()
+        call_command('gc_media', dry_run=True, min_age=60, stdout=out,
+                     stderr=err)
+        self.assertIn(self.orphan, out.getvalue())
+        self.assertIn('лишних: 2, удалено: 0', err.getvalue())
+        self.assertTrue(os.path.exists(self.orphan))
+
+    def test_abandoned_uploads_are_removed(self):
+        '''Старые файлы каталога загрузок удаляются, свежие остаются'''
+        abandoned = self.write('tmp/abandoned.upload.jpg')
+        uploading = self.write('tmp/uploading.upload.jpg', age=0)
+        self.assertEqual(os.path.dirname(abandoned), upload_dir())
+        _, orphans = self.collect()
+        self.assertIn(abandoned, orphans)
+        self.assertFalse(os.path.exists(abandoned))
+        self.assertTrue(os.path.exists(uploading))
@@ -0,0 +1,90 @@
+import hashlib
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.pagecache import KEY_PREFIX
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class AnonymousPageCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='auth')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.group = Group.objects.create(title='Тестовая группа',
+                                          slug='test_group')
+        self.post = Post.objects.create(text='Тестовый текст',
+                                        group=self.group,
+                                        author=self.user)
+        self.pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+
+    def test_guest_pages_are_cached(self):
+        '''Повторный запрос анонима отдаётся из кеша'''
+        for page in self.pages:
+            with self.subTest(page=page):
+                first = self.guest_client.get(page)
+                second = self.guest_client.get(page)
+                self.assertEqual(first['X-Page-Cache'], 'MISS')
+                self.assertEqual(second['X-Page-Cache'], 'HIT')
+                self.assertEqual(first.content, second.content)
+
+    def test_query_string_is_part_of_key(self):
+        '''Разные страницы пагинатора кешируются отдельно'''
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('posts:index') + '?page=2')
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+
+    def test_authorized_user_is_not_cached(self):
+        '''Страницы пользователя с сессией не кешируются'''
+        for _ in range(2):
+            response = self.authorized_client.get(reverse('posts:index'))
+            self.assertFalse(response.has_header('X-Page-Cache'))
+
+    def test_signals_invalidate_tags(self):
+        '''Изменения моделей сбрасывают связанные страницы'''
+        detail = reverse('posts:post_detail',
+                         kwargs={'post_id': self.post.id})
+        profile = reverse('posts:profile',
+                          kwargs={'username': self.user.username})
+        changes = {
+            reverse('posts:index'): lambda: Post.objects.create(
+                text='Новый пост', author=self.user),
+            detail: lambda: Comment.objects.create(
+                text='Комментарий', post=self.post, author=self.user),
+            profile: lambda: Follow.objects.create(
+                user=User.objects.create_user(username='fan'),
+                author=self.user),
+        }
+        for page, change in changes.items():
+            with self.subTest(page=page):
+                self.guest_client.get(page)
+                change()
+                response = self.guest_client.get(page)
+                self.assertEqual(response['X-Page-Cache'], 'MISS')
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_stale_page_served_while_refreshing(self):
+        '''Устаревшая страница отдаётся, пока её обновляет другой запрос'''
+        page = reverse('posts:index')
+        self.guest_client.get(page)
+        time.sleep(0.01)
+        key = KEY_PREFIX + hashlib.md5(page.encode()).hexdigest()
+        cache.add(key + ':lock', 1)
+        response = self.guest_client.get(page)
+        self.assertEqual(response['X-Page-Cache'], 'STALE')
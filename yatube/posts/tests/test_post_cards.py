@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.template import engines
+from django.test import TestCase
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+def squash(html):
+    return ' '.join(html.split())
+
+
+class PostCardTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='auth')
+        group = Group.objects.create(title='Группа', slug='group',
+                                     description='Описание')
+        cls.posts = [Post.objects.create(author=user, group=group,
+                                         text='Пост в группе'),
+                     Post.objects.create(author=user, text='Пост')]
+
+    def render(self, source):
+        return squash(engines['django'].from_string(source).render(
+            {'posts': self.posts}))
+
+    def test_post_card_matches_include(self):
+        '''post_card выводит то же, что include group-article.html'''
+        include = self.render(
+            '{% for post in posts %}'
+            "{% include 'posts/group-article.html' with "
+            'profile_link_flag=True author_link=True %}{% endfor %}')
+        card = self.render(
+            '{% load post_cards %}{% for post in posts %}'
+            '{% post_card post profile_link_flag=True author_link=True '
+            'last=forloop.last %}{% endfor %}')
+        self.assertEqual(card, include)
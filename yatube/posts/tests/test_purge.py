@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notifications.models import Event, Notification
+
+from .. import trending
+from ..models import Comment, Follow, Post, Recommendation, UserPurge
+from ..purge import purge, soft_delete_posts, soft_delete_user
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00\x01\x00\x80\x00\x00\x00'
+             b'\x00\x00\xFF\xFF\xFF\x21\xF9\x04\x00\x00\x00\x00\x00\x2C'
+             b'\x00\x00\x00\x00\x02\x00\x01\x00\x00\x02\x02\x0C\x0A\x00'
+             b'\x3B')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SoftDeleteTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(
+            text='Пост', author=self.author,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'))
+        self.other = Post.objects.create(text='Чужой', author=self.reader)
+        Comment.objects.create(post=self.other, author=self.author,
+                               text='Комментарий автора')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client = Client()
+
+    def tearDown(self):
+        trending.events.reset()
+
+    def test_soft_deleted_post_is_hidden_at_once(self):
+        '''Помеченный пост пропадает из ленты и открывается как 404'''
+        self.client.get(reverse('posts:index'))
+        soft_delete_posts(Post.objects.filter(pk=self.post.pk))
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(list(response.context['page_obj']), [self.other])
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertTrue(Post.all_objects.filter(pk=self.post.pk).exists())
+
+    def test_purge_removes_rows_and_image(self):
+        path = self.post.image.path
+        soft_delete_posts(Post.objects.filter(pk=self.post.pk))
+        while purge(batch_size=10):
+            pass
+        self.assertFalse(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_user_is_purged_in_batches(self):
+        '''Пользователь блокируется сразу, а строки уходят пачками'''
+        soft_delete_user(self.author)
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertFalse(Comment.objects.filter(author=self.author).exists())
+        self.assertTrue(UserPurge.objects.filter(user=self.author).exists())
+        while purge(batch_size=1):
+            pass
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Post.all_objects.filter(
+            author_id=self.author.pk).exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertTrue(Post.objects.filter(pk=self.other.pk).exists())
+
+    def rows(self):
+        return sum(model.count() for model in (
+            User.objects, UserPurge.objects, Post.all_objects,
+            Comment.all_objects, Follow.objects, Recommendation.objects,
+            Event.objects, Notification.objects))
+
+    def test_dependents_are_purged_in_batches(self):
+        '''Ни один вызов не удаляет каскадом больше пачки строк'''
+        for number in range(3):
+            Comment.objects.create(post=self.post, author=self.reader,
+                                   text=f'Ответ {number}')
+        Event.objects.create(kind='post', actor=self.author, post=self.post)
+        Notification.objects.create(recipient=self.reader, kind='post',
+                                    key=f'post:{self.author.pk}',
+                                    actor=self.author, post=self.post)
+        Notification.objects.create(recipient=self.author, kind='comment',
+                                    key=f'comment:{self.other.pk}',
+                                    actor=self.reader, post=self.other)
+        Recommendation.objects.create(user=self.reader, author=self.author,
+                                      score=1, rank=1)
+        Recommendation.objects.create(user=self.author, author=self.reader,
+                                      score=1, rank=1)
+        soft_delete_user(self.author)
+        rows = self.rows()
+        while True:
+            done = purge(batch_size=2)
+            if not done:
+                break
+            # За вызов — не больше пачки постов и пачки комментариев
+            self.assertLessEqual(rows - self.rows(), 4)
+            rows = self.rows()
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Comment.all_objects.filter(
+            post_id=self.post.pk).exists())
+        self.assertFalse(Recommendation.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(
+            Event.objects.filter(actor_id=self.author.pk).exists())
+        self.assertTrue(Post.objects.filter(pk=self.other.pk).exists())
+
+    def test_admin_delete_only_marks_user(self):
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.client.force_login(admin)
+        self.client.post(
+            reverse('admin:auth_user_delete', args=[self.author.pk]),
+            {'post': 'yes'})
+        self.assertTrue(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+        out = StringIO()
+        call_command('purge_deleted', stdout=out)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
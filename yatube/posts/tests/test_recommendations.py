@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Recommendation
+from ..recommendations import FollowGraph, recommend
+
+User = get_user_model()
+
+
+class RecommendationTest(TestCase):
+
+    def setUp(self):
+        self.users = {name: User.objects.create_user(username=name)
+                      for name in ('anna', 'boris', 'vera', 'gleb', 'dina')}
+        for user, author in (('anna', 'boris'),
+                             ('boris', 'vera'),
+                             ('gleb', 'boris'),
+                             ('gleb', 'dina')):
+            Follow.objects.create(user=self.users[user],
+                                  author=self.users[author])
+        self.client = Client()
+        self.client.force_login(self.users['anna'])
+
+    def test_graph_is_compact(self):
+        '''Граф хранится в CSR-массивах на плотных индексах'''
+        graph = FollowGraph.load()
+        anna = graph.index[self.users['anna'].pk]
+        boris = graph.index[self.users['boris'].pk]
+        self.assertEqual(list(graph.followed_by(anna)), [boris])
+        self.assertEqual(len(graph.followers_of(boris)), 2)
+
+    def test_friends_of_friends_and_co_follows(self):
+        '''Рекомендуются авторы соседей, но не уже подписанные'''
+        graph = FollowGraph.load()
+        ids = [graph.ids[author] for author, _ in recommend(
+            graph, graph.index[self.users['anna'].pk], top_k=5)]
+        self.assertEqual(set(ids), {self.users['vera'].pk,
+                                    self.users['dina'].pk})
+        self.assertEqual(ids[0], self.users['vera'].pk)
+
+    def test_suggestions_shown_on_profile_and_follow_index(self):
+        '''Профиль и лента подписок показывают рекомендации'''
+        call_command('recommend_authors', stdout=StringIO())
+        pages = (reverse('posts:follow_index'),
+                 reverse('posts:profile', kwargs={'username': 'boris'}))
+        for page in pages:
+            with self.subTest(page=page):
+                response = self.client.get(page)
+                authors = [suggestion.author for suggestion
+                           in response.context['suggestions']]
+                self.assertEqual(authors[0], self.users['vera'])
+
+    def test_follow_removes_suggestion(self):
+        '''Подписка убирает автора из рекомендаций'''
+        call_command('recommend_authors', stdout=StringIO())
+        self.client.get(reverse('posts:profile_follow',
+                                kwargs={'username': 'vera'}))
+        self.assertFalse(Recommendation.objects.filter(
+            user=self.users['anna'], author=self.users['vera']).exists())
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+LONG_TEXT = 'Начало поста\n\n' + 'слово ' * 200 + 'КОНЕЦ'
+
+
+@override_settings(POST_EXCERPT_LENGTH=50)
+class RenderedTextTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        self.post = Post.objects.create(text=LONG_TEXT, author=self.user)
+        self.client = Client()
+
+    def test_text_is_rendered_on_save(self):
+        '''Начало и HTML текста считаются при сохранении'''
+        self.assertEqual(len(self.post.excerpt), 50)
+        self.assertTrue(self.post.text_html.startswith(
+            '<p>Начало поста</p>'))
+        self.post.text = 'Новый <текст>'
+        self.post.save()
+        self.assertEqual(self.post.text_html, '<p>Новый &lt;текст&gt;</p>')
+
+    def test_feed_shows_excerpt_without_loading_text(self):
+        response = self.client.get(reverse('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertEqual(post.get_deferred_fields(), {'text', 'text_html'})
+        self.assertContains(response, 'Начало поста')
+        self.assertNotContains(response, 'КОНЕЦ')
+
+    def test_detail_page_uses_rendered_html(self):
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertContains(response, '<p>Начало поста</p>', html=False)
+        self.assertContains(response, 'КОНЕЦ')
+
+    def test_update_fields_text_saves_rendered_fields(self):
+        '''save(update_fields=['text']) сохраняет и excerpt с text_html'''
+        self.post.text = 'Правка'
+        self.post.save(update_fields=['text'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.excerpt, 'Правка')
+        self.assertEqual(self.post.text_html, '<p>Правка</p>')
+
+    def test_detail_page_without_rendered_html(self):
+        '''Пост без text_html показывается через linebreaks'''
+        Post.objects.filter(pk=self.post.pk).update(text_html='')
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertContains(response, '<p>Начало поста</p>', html=False)
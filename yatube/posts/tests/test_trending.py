@@ -0,0 +1,98 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..models import ActivityBucket, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class TrendingTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        trending.events.reset()
+        self.user = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(title='Тестовая группа',
+                                          slug='test_group')
+        self.quiet = Post.objects.create(text='Тихий пост',
+                                         author=self.user)
+        self.popular = Post.objects.create(text='Популярный пост',
+                                           group=self.group,
+                                           author=self.user)
+        self.guest_client = Client()
+
+    def test_events_are_buffered_then_flushed(self):
+        '''События копятся в памяти и сливаются одной пачкой'''
+        for _ in range(3):
+            self.guest_client.get(reverse(
+                'posts:post_detail', kwargs={'post_id': self.popular.pk}))
+        Comment.objects.create(post=self.popular, author=self.user,
+                               text='Комментарий')
+        self.assertFalse(ActivityBucket.objects.exists())
+        trending.events.flush()
+        bucket = ActivityBucket.objects.get(target=ActivityBucket.POST,
+                                            object_id=self.popular.pk)
+        self.assertEqual((bucket.views, bucket.comments), (3, 1))
+        self.assertTrue(ActivityBucket.objects.filter(
+            target=ActivityBucket.GROUP, object_id=self.group.pk).exists())
+
+    def test_old_activity_decays(self):
+        '''Давняя активность весит меньше свежей'''
+        now = timezone.now()
+        ActivityBucket.objects.create(
+            target=ActivityBucket.POST, object_id=self.quiet.pk,
+            bucket=now - timedelta(days=1), comments=3)
+        ActivityBucket.objects.create(
+            target=ActivityBucket.POST, object_id=self.popular.pk,
+            bucket=now, comments=2)
+        top = trending.refresh()
+        self.assertEqual(top['posts'], [self.popular.pk, self.quiet.pk])
+
+    def test_author_follows_boost_posts(self):
+        '''Подписки на автора поднимают его посты'''
+        other = User.objects.create_user(username='other')
+        other_post = Post.objects.create(text='Другой', author=other)
+        for post in (self.popular, other_post):
+            Comment.objects.create(post=post, author=self.user, text='Да')
+        Follow.objects.create(user=self.user, author=other)
+        trending.events.flush()
+        top = trending.refresh()
+        self.assertEqual(top['posts'][0], other_post.pk)
+
+    def test_trending_page_served_from_cache(self):
+        '''Страница популярного читает готовый топ из кеша'''
+        Comment.objects.create(post=self.popular, author=self.user,
+                               text='Комментарий')
+        trending.events.flush()
+        trending.refresh()
+        Comment.objects.create(post=self.quiet, author=self.user,
+                               text='Комментарий')
+        response = self.guest_client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['posts'], [self.popular])
+        self.assertEqual(response.context['groups'], [self.group])
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': 'local'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                   'LOCATION': 'shared'}})
+    def test_command_result_reaches_workers(self):
+        '''Топ и сброс тега от команды лежат в общем кеше'''
+        Comment.objects.create(post=self.popular, author=self.user,
+                               text='Комментарий')
+        trending.events.flush()
+        call_command('refresh_trending', stdout=StringIO())
+        self.assertIsNotNone(caches['shared'].get(trending.CACHE_KEY))
+        self.assertIsNotNone(caches['shared'].get('pagecache-tag:trending'))
+        # Кеш процесса команды пропадает вместе с ней
+        caches['default'].clear()
+        response = self.guest_client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['posts'], [self.popular])
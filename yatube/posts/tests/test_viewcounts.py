@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+from ..viewcounts import post_views
+
+User = get_user_model()
+
+
+class ViewCountTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        post_views.reset()
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(text='Тестовый текст',
+                                        author=self.user)
+        self.other = Post.objects.create(text='Другой текст',
+                                         author=self.user)
+        self.guest_client = Client()
+        self.url = reverse('posts:post_detail',
+                           kwargs={'post_id': self.post.pk})
+
+    def test_views_are_written_in_batch(self):
+        '''Просмотры попадают в базу только при сбросе счётчика'''
+        for _ in range(3):
+            self.guest_client.get(self.url)
+        self.guest_client.get(reverse('posts:post_detail',
+                                      kwargs={'post_id': self.other.pk}))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 0)
+        post_views.flush()
+        self.post.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.post.views, self.other.views), (3, 1))
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_cached_pages_are_counted(self):
+        '''Отдача страницы из кеша тоже считается просмотром'''
+        self.guest_client.get(self.url)
+        response = self.guest_client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        post_views.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 2)
+
+    def test_profile_shows_total_views(self):
+        '''Профиль показывает суммарные просмотры постов автора'''
+        Post.objects.filter(pk=self.post.pk).update(views=5)
+        Post.objects.filter(pk=self.other.pk).update(views=2)
+        response = self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': 'auth'}))
+        self.assertEqual(response.context['views'], 7)
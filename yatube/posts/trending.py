@@ -0,0 +1,134 @@
+'''«Популярное сейчас»: счётчики по интервалам и затухающая оценка.
+
+События (комментарии, подписки, просмотры) копятся в памяти процесса
+и пачкой сливаются в ActivityBucket. Список лучших постов и групп
+пересчитывается не чаще TRENDING_REFRESH и отдаётся из общего для
+процессов кеша TRENDING_CACHE, так что список, посчитанный командой
+refresh_trending, видят все воркеры.
+'''
+import math
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+from django.utils.timezone import utc
+
+from core.counters import BufferedCounter, bump
+from core.pagecache import invalidate
+
+from .models import ActivityBucket, Post
+
+CACHE_KEY = 'trending'
+WEIGHTS = {'comments': 3.0, 'follows': 5.0, 'views': 0.1}
+
+
+def _cache():
+    return caches[settings.TRENDING_CACHE]
+
+
+def _bucket_start(moment=None):
+    moment = moment or timezone.now()
+    size = settings.TRENDING_BUCKET
+    return datetime.fromtimestamp(int(moment.timestamp()) // size * size,
+                                  tz=utc)
+
+
+def _flush(deltas):
+    rows = defaultdict(dict)
+    for (target, object_id, bucket, field), delta in deltas.items():
+        rows[target, object_id, bucket][field] = delta
+    with transaction.atomic():
+        for (target, object_id, bucket), fields in rows.items():
+            bump(ActivityBucket,
+                 {'target': target, 'object_id': object_id,
+                  'bucket': bucket},
+                 **fields)
+
+
+events = BufferedCounter(_flush, settings.TRENDING_FLUSH_INTERVAL)
+
+
+def _record(field, *targets):
+    bucket = _bucket_start()
+    for target, object_id in targets:
+        events.incr((target, object_id, bucket, field))
+
+
+def _post_targets(post_id, group_id):
+    targets = [(ActivityBucket.POST, post_id)]
+    if group_id:
+        targets.append((ActivityBucket.GROUP, group_id))
+    return targets
+
+
+def record_view(post_id, group_id=None):
+    _record('views', *_post_targets(post_id, group_id))
+
+
+def record_comment(comment):
+    _record('comments', *_post_targets(comment.post_id,
+                                       comment.post.group_id))
+
+
+def record_follow(follow):
+    _record('follows', (ActivityBucket.AUTHOR, follow.author_id))
+
+
+def scores(now=None):
+    '''Затухающие оценки по объектам: {(target, id): score}'''
+    now = now or timezone.now()
+    since = now - timedelta(seconds=settings.TRENDING_WINDOW)
+    decay = math.log(2) / settings.TRENDING_HALF_LIFE
+    result = Counter()
+    rows = ActivityBucket.objects.filter(bucket__gte=since).values_list(
+        'target', 'object_id', 'bucket', *WEIGHTS)
+    for target, object_id, bucket, *counts in rows.iterator():
+        weight = sum(count * w for count, w in zip(counts, WEIGHTS.values()))
+        age = (now - bucket).total_seconds()
+        result[target, object_id] += weight * math.exp(-decay * age)
+    return result
+
+
+def refresh():
+    '''Пересчитывает топ постов и групп и кладёт его в кеш'''
+    now = timezone.now()
+    ActivityBucket.objects.filter(
+        bucket__lt=now - timedelta(seconds=settings.TRENDING_WINDOW)
+    ).delete()
+    by_target = defaultdict(dict)
+    for (target, object_id), score in scores(now).items():
+        by_target[target][object_id] = score
+    posts = by_target[ActivityBucket.POST]
+    authors = by_target[ActivityBucket.AUTHOR]
+    candidates = list(posts) if authors else []
+    for start in range(0, len(candidates), 500):
+        for pk, author_id in Post.objects.filter(
+                pk__in=candidates[start:start + 500]
+        ).values_list('pk', 'author_id'):
+            posts[pk] += authors.get(author_id, 0)
+    size = settings.TRENDING_SIZE
+    top = {'posts': sorted(posts, key=posts.get, reverse=True)[:size],
+           'groups': sorted(by_target[ActivityBucket.GROUP],
+                            key=by_target[ActivityBucket.GROUP].get,
+                            reverse=True)[:size]}
+    _cache().set(CACHE_KEY, top, settings.TRENDING_REFRESH)
+    invalidate('trending')
+    return top
+
+
+def get_trending():
+    '''Топ из кеша; пересчёт выполняет только один запрос'''
+    cache = _cache()
+    top = cache.get(CACHE_KEY)
+    if top is None:
+        if cache.add(CACHE_KEY + ':lock', 1, settings.TRENDING_REFRESH):
+            try:
+                top = refresh()
+            finally:
+                cache.delete(CACHE_KEY + ':lock')
+        else:
+            top = {'posts': [], 'groups': []}
+    return top
@@ -16,6 +16,20 @@ urlpatterns = [path('', views.index, name='index'),
                path('posts/<int:post_id>/comment/', views.add_comment,
                     name='add_comment'),
                path('follow/', views.follow_index, name='follow_index'),
+               path('trending/', views.trending, name='trending'),
+               path('feeds/rss/', views.feed,
+                    {'kind': 'index', 'fmt': 'rss'}, name='index_feed'),
+               path('feeds/atom/', views.feed,
+                    {'kind': 'index', 'fmt': 'atom'}, name='index_atom'),
+               path('group/<slug:slug>/rss/', views.feed,
+                    {'kind': 'group', 'fmt': 'rss'}, name='group_feed'),
+               path('group/<slug:slug>/atom/', views.feed,
+                    {'kind': 'group', 'fmt': 'atom'}, name='group_atom'),
+               path('profile/<str:username>/rss/', views.feed,
+                    {'kind': 'profile', 'fmt': 'rss'}, name='profile_feed'),
+               path('profile/<str:username>/atom/', views.feed,
+                    {'kind': 'profile', 'fmt': 'atom'},
+                    name='profile_atom'),
                path('profile/<str:username>/follow/', views.profile_follow,
                     name='profile_follow'),
                path('profile/<str:username>/unfollow/', views.profile_unfollow,
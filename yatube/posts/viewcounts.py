@@ -0,0 +1,34 @@
+'''Счётчики просмотров постов без записи в базу на каждый запрос.
+
+Просмотры копятся в памяти процесса, и фоновый поток раз в
+VIEW_COUNTER_FLUSH_INTERVAL секунд сливает их в Post.views одним UPDATE
+на пачку постов — вне транзакций запросов.
+'''
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Value, When
+
+from core.counters import BufferedCounter
+
+from . import trending
+from .models import Post
+
+FLUSH_CHUNK = 400
+
+
+def _flush(deltas):
+    items = list(deltas.items())
+    for start in range(0, len(items), FLUSH_CHUNK):
+        chunk = items[start:start + FLUSH_CHUNK]
+        Post.objects.filter(pk__in=[pk for pk, _ in chunk]).update(
+            views=F('views') + Case(
+                *[When(pk=pk, then=Value(delta)) for pk, delta in chunk],
+                default=Value(0),
+                output_field=IntegerField()))
+
+
+post_views = BufferedCounter(_flush, settings.VIEW_COUNTER_FLUSH_INTERVAL)
+
+
+def record_post_view(post_id, group_id=None):
+    post_views.incr(post_id)
+    trending.record_view(post_id, group_id)
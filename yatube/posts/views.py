@@ -2,10 +2,23 @@ from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.core.paginator import Paginator
+from django.db.models import Sum
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 
+from core.db import retry_on_lock
+from core.pagecache import tag_response
+
+from . import feeds
+from .following import is_following
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from .models import ArchivedPost, Follow, Group, Post, Recommendation
+from .recommendations import suggestions_for
+from .rendering import FEED_DEFERRED
+from .trending import get_trending
+from .viewcounts import record_post_view
 
 
 def paginator_group(request, post_list):
@@ -15,24 +28,32 @@ def paginator_group(request, post_list):
     return page_obj
 
 
+def post_tags(posts):
+    return [f'post:{post.pk}' for post in posts]
+
+
 def index(request):
     template = 'posts/index.html'
-    post_list = Post.objects.select_related('author', 'group').all()
+    post_list = Post.objects.select_related('author', 'group').defer(
+        *FEED_DEFERRED)
     page_obj = paginator_group(request, post_list)
-    return render(request, template, {'page_obj': page_obj})
+    return tag_response(render(request, template, {'page_obj': page_obj}),
+                        'feed', *post_tags(page_obj))
 
 
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    post_list = Post.objects.select_related('author').all()
+    post_list = Post.objects.select_related('author').defer(*FEED_DEFERRED)
     page_obj = paginator_group(request, post_list)
     context = {'group': group,
                'page_obj': page_obj}
-    return render(request, template, context)
+    return tag_response(render(request, template, context),
+                        'feed', f'group:{group.slug}', *post_tags(page_obj))
 
 
 @login_required
+@retry_on_lock
 def post_create(request):
     template = 'posts/create_post.html'
     form = PostForm(request.POST or None,
@@ -46,6 +67,7 @@ def post_create(request):
 
 
 @login_required
+@retry_on_lock
 def post_edit(request, post_id):
     template = 'posts/create_post.html'
     post = get_object_or_404(Post, id=post_id)
@@ -72,31 +94,75 @@ def post_edit(request, post_id):
 def profile(request, username):
     template = 'posts/profile.html'
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related('group').all()
+    post_list = author.posts.select_related('group').defer(*FEED_DEFERRED)
     page_obj = paginator_group(request, post_list)
-    following = (request.user.is_authenticated
-                 and Follow.objects.filter(
-                     user=request.user,
-                     author=author).exists())
+    views = author.posts.aggregate(views=Sum('views'))['views'] or 0
+    following = is_following(request.user, author.pk)
     context = {
         'page_obj': page_obj,
         'author': author,
-        'following': following}
-    return render(request, template, context)
+        'views': views,
+        'following': following,
+        'suggestions': suggestions_for(request.user)}
+    return tag_response(render(request, template, context),
+                        f'author:{author.pk}', *post_tags(page_obj))
 
 
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, id=post_id)
+    post = Post.objects.filter(id=post_id).first()
+    if post is None:
+        return archived_post_detail(request, post_id)
+    record_post_view(post.pk, post.group_id)
     comments = post.comments.all()
     form = CommentForm()
     context = {'post': post,
                'form': form,
                'comments': comments}
-    return render(request, template, context)
+    tags = [f'post:{post.pk}', f'author:{post.author_id}']
+    if post.group:
+        tags.append(f'group:{post.group.slug}')
+    return tag_response(render(request, template, context), *tags,
+                        on_hit=('posts.viewcounts.record_post_view',
+                                (post.pk, post.group_id)))
+
+
+def archived_post_detail(request, post_id):
+    '''Пост из архива: только чтение, без счётчика и комментирования'''
+    template = 'posts/post_detail.html'
+    post = get_object_or_404(
+        ArchivedPost.objects.select_related('author', 'group'), id=post_id)
+    context = {'post': post,
+               'comments': post.comments.select_related('author'),
+               'archived': True}
+    return tag_response(render(request, template, context),
+                        f'post:{post.pk}', f'author:{post.author_id}')
+
+
+def trending(request):
+    template = 'posts/trending.html'
+    top = get_trending()
+    posts = Post.objects.select_related('author', 'group').defer(
+        *FEED_DEFERRED).in_bulk(top['posts'])
+    groups = Group.objects.in_bulk(top['groups'])
+    context = {'posts': [posts[pk] for pk in top['posts'] if pk in posts],
+               'groups': [groups[pk] for pk in top['groups'] if pk in groups]}
+    return tag_response(render(request, template, context), 'trending')
+
+
+def feed(request, kind, fmt, slug=None, username=None):
+    snapshot = feeds.snapshot(kind, fmt, slug or username)
+    response = HttpResponse(snapshot['content'],
+                            content_type=snapshot['content_type'])
+    response['ETag'] = quote_etag(snapshot['etag'])
+    response['Last-Modified'] = http_date(snapshot['last_modified'])
+    return get_conditional_response(
+        request, etag=response['ETag'],
+        last_modified=int(snapshot['last_modified']), response=response)
 
 
 @login_required
+@retry_on_lock
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -111,22 +177,27 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     template = 'posts/follow.html'
-    posts_list = Post.objects.filter(author__following__user=request.user)
+    posts_list = Post.objects.filter(
+        author__following__user=request.user).defer(*FEED_DEFERRED)
     page = paginator_group(request, posts_list)
-    context = {"page_obj": page}
+    context = {"page_obj": page,
+               "suggestions": suggestions_for(request.user)}
     return render(request, template, context)
 
 
 @login_required
+@retry_on_lock
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     user = request.user
     if author != user:
         Follow.objects.get_or_create(user=user, author=author)
+        Recommendation.objects.filter(user=user, author=author).delete()
     return redirect("posts:profile", username=username)
 
 
 @login_required
+@retry_on_lock
 def profile_unfollow(request, username):
     user = request.user
     Follow.objects.filter(user=user, author__username=username).delete()
@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import DailyStat
+
+
+class DailyStatAdmin(admin.ModelAdmin):
+    list_display = ('day', 'group', 'posts', 'comments', 'signups',
+                    'follows')
+    list_filter = ('day',)
+    empty_value_display = '-сайт-'
+
+
+admin.site.register(DailyStat, DailyStatAdmin)
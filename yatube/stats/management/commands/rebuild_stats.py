@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from stats.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает дневную статистику по исходным таблицам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=settings.STATS_REBUILD_DAYS,
+                            help='Сколько последних дней пересчитать')
+
+    def handle(self, *args, **options):
+        rows = rebuild(options['days'])
+        self.stdout.write(f'Пересчитано строк: {rows}')
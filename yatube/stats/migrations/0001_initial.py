@@ -0,0 +1,41 @@
+# Generated by Django 2.2.16 on 2026-10-19 15:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('posts', '0012_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStat',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='Посты')),
+                ('comments', models.PositiveIntegerField(default=0, verbose_name='Комментарии')),
+                ('signups', models.PositiveIntegerField(default=0, verbose_name='Регистрации')),
+                ('follows', models.PositiveIntegerField(default=0, verbose_name='Подписки')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Статистика за день',
+                'verbose_name_plural': 'Статистика по дням',
+                'ordering': ('-day',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailystat',
+            constraint=models.UniqueConstraint(fields=('day', 'group'), name='unique_daily_group_stat'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailystat',
+            constraint=models.UniqueConstraint(condition=models.Q(group=None), fields=('day',), name='unique_daily_site_stat'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import models
+
+from posts.models import Group
+
+
+class DailyStat(models.Model):
+    '''Счётчики за день; строка без группы — итог по всему сайту'''
+    day = models.DateField('День')
+    group = models.ForeignKey(Group, on_delete=models.CASCADE,
+                              blank=True, null=True,
+                              related_name='+', verbose_name='Группа')
+    posts = models.PositiveIntegerField('Посты', default=0)
+    comments = models.PositiveIntegerField('Комментарии', default=0)
+    signups = models.PositiveIntegerField('Регистрации', default=0)
+    follows = models.PositiveIntegerField('Подписки', default=0)
+
+    def __str__(self):
+        return f'{self.day} {self.group or "сайт"}'
+
+    class Meta:
+        verbose_name = 'Статистика за день'
+        verbose_name_plural = 'Статистика по дням'
+        ordering = ('-day',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'group'], name='unique_daily_group_stat'),
+            # NULL в уникальном индексе не сравнивается, поэтому итог
+            # по сайту ограничен отдельным частичным индексом
+            models.UniqueConstraint(
+                fields=['day'], condition=models.Q(group=None),
+                name='unique_daily_site_stat'),
+        ]
@@ -0,0 +1,111 @@
+'''Ежедневные агрегаты по сайту и группам.
+
+Сигналы прибавляют единицу к строке дня при каждом создании поста,
+комментария, пользователя или подписки, так что дашборд читает только
+DailyStat. Команда rebuild_stats пересчитывает посты, комментарии и
+регистрации за последние дни по исходным таблицам — по дню за
+транзакцию, чтобы не держать блокировку SQLite. У подписок нет даты,
+их счётчик ведут только сигналы.
+'''
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from core.counters import bump
+from posts.models import Comment, Post
+
+from .models import DailyStat
+
+User = get_user_model()
+REBUILT = ('posts', 'comments', 'signups')
+
+
+def record(moment, group_id=None, **counts):
+    day = timezone.localdate(moment)
+    bump(DailyStat, {'day': day, 'group_id': None}, **counts)
+    if group_id:
+        bump(DailyStat, {'day': day, 'group_id': group_id}, **counts)
+
+
+def record_many(name, items):
+    '''Пачка событий (момент, группа): один bump на день и группу'''
+    counts = Counter()
+    for moment, group_id in items:
+        day = timezone.localdate(moment)
+        counts[day, None] += 1
+        if group_id:
+            counts[day, group_id] += 1
+    for (day, group_id), count in counts.items():
+        bump(DailyStat, {'day': day, 'group_id': group_id}, **{name: count})
+
+
+def _bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def count_day(day):
+    '''{group_id или None: {счётчик: значение}} по исходным таблицам'''
+    start, end = _bounds(day)
+    totals = defaultdict(lambda: dict.fromkeys(REBUILT, 0))
+    queries = (
+        ('posts', Post.objects.filter(pub_date__gte=start,
+                                      pub_date__lt=end), 'group_id'),
+        ('comments', Comment.objects.filter(pub_date__gte=start,
+                                            pub_date__lt=end),
+         'post__group_id'),
+    )
+    for name, queryset, group in queries:
+        for group_id, count in queryset.order_by().values_list(
+                group).annotate(count=Count('pk')):
+            totals[None][name] += count
+            if group_id:
+                totals[group_id][name] += count
+    totals[None]['signups'] = User.objects.filter(
+        date_joined__gte=start, date_joined__lt=end).count()
+    return totals
+
+
+def rebuild_day(day):
+    '''Пересчитывает посты, комментарии и регистрации за день'''
+    with transaction.atomic():
+        totals = count_day(day)
+        existing = {stat.group_id: stat
+                    for stat in DailyStat.objects.filter(day=day)}
+        created, updated = [], []
+        for group_id in existing.keys() | totals.keys():
+            counts = totals.get(group_id, dict.fromkeys(REBUILT, 0))
+            stat = existing.get(group_id)
+            if stat is None:
+                created.append(DailyStat(day=day, group_id=group_id,
+                                         **counts))
+                continue
+            for name, value in counts.items():
+                setattr(stat, name, value)
+            updated.append(stat)
+        DailyStat.objects.bulk_create(created)
+        DailyStat.objects.bulk_update(updated, REBUILT)
+    return len(created) + len(updated)
+
+
+def rebuild(days):
+    '''Пересчитывает последние days дней, включая сегодняшний'''
+    today = timezone.localdate()
+    return sum(rebuild_day(today - timedelta(days=offset))
+               for offset in range(days))
+
+
+def summary(days):
+    '''Итоги сайта по дням и по группам за период — только из DailyStat'''
+    since = timezone.localdate() - timedelta(days=days - 1)
+    stats = DailyStat.objects.filter(day__gte=since)
+    totals = list(stats.filter(group=None).order_by('-day'))
+    groups = list(stats.exclude(group=None).order_by().values(
+        'group__title', 'group__slug').annotate(
+        posts=Sum('posts'), comments=Sum('comments')).order_by(
+        '-posts', 'group__title'))
+    return {'days': totals, 'groups': groups, 'since': since}
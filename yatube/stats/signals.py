@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.db import post_bulk_create
+from posts.models import Comment, Follow, Post
+
+from .rollups import record, record_many
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        record(instance.pub_date, instance.group_id, posts=1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        group_id = instance.post.group_id if instance.post_id else None
+        record(instance.pub_date, group_id, comments=1)
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    if created:
+        record(instance.date_joined, signups=1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        record(timezone.now(), follows=1)
+
+
+@receiver(post_bulk_create, sender=Post)
+def posts_bulk_created(sender, instances, **kwargs):
+    record_many('posts', [(post.pub_date, post.group_id)
+                          for post in instances])
+
+
+@receiver(post_bulk_create, sender=Comment)
+def comments_bulk_created(sender, instances, **kwargs):
+    record_many('comments', [(comment.pub_date, comment.post.group_id)
+                             for comment in instances])
+
+
+@receiver(post_bulk_create, sender=Follow)
+def follows_bulk_created(sender, instances, **kwargs):
+    now = timezone.now()
+    record_many('follows', [(now, None) for _ in instances])
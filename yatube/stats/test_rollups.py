@@ -0,0 +1,86 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.counters import bump
+from posts.models import Comment, Follow, Group, Post
+
+from .models import DailyStat
+from .rollups import rebuild
+
+User = get_user_model()
+
+
+class RollupTests(TestCase):
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Группа', slug='group')
+
+    def stat(self, group=None, day=None):
+        return DailyStat.objects.get(day=day or self.today, group=group)
+
+    def test_signals_update_site_and_group_rows(self):
+        '''Создание объектов увеличивает счётчики дня и группы'''
+        post = Post.objects.create(text='Пост', author=self.author,
+                                   group=self.group)
+        Post.objects.create(text='Без группы', author=self.author)
+        Comment.objects.create(post=post, author=self.reader, text='Да')
+        Follow.objects.create(user=self.reader, author=self.author)
+        site = self.stat()
+        self.assertEqual(
+            (site.posts, site.comments, site.signups, site.follows),
+            (2, 1, 2, 1))
+        group = self.stat(self.group)
+        self.assertEqual((group.posts, group.comments), (1, 1))
+
+    def test_bump_creates_single_row(self):
+        site = {'day': self.today, 'group_id': None}
+        bump(DailyStat, site, posts=1)
+        bump(DailyStat, site, posts=2)
+        self.assertEqual(self.stat().posts, 3)
+        self.assertEqual(DailyStat.objects.filter(group=None).count(), 1)
+
+    def test_rebuild_fixes_drift_and_keeps_follows(self):
+        '''Пересчёт по таблицам исправляет счётчики, подписки не трогает'''
+        post = Post.objects.create(text='Пост', author=self.author,
+                                   group=self.group)
+        Follow.objects.create(user=self.reader, author=self.author)
+        yesterday = timezone.now() - timedelta(days=1)
+        Post.objects.filter(pk=post.pk).update(pub_date=yesterday)
+        DailyStat.objects.update(posts=100)
+        rebuild(2)
+        self.assertEqual((self.stat().posts, self.stat().follows), (0, 1))
+        self.assertEqual(self.stat(self.group).posts, 0)
+        day = timezone.localdate(yesterday)
+        self.assertEqual(self.stat(day=day).posts, 1)
+        self.assertEqual(self.stat(self.group, day).posts, 1)
+        out = StringIO()
+        call_command('rebuild_stats', days=1, stdout=out)
+        self.assertIn('Пересчитано строк', out.getvalue())
+
+    def test_dashboard_reads_only_rollups(self):
+        Post.objects.create(text='Пост', author=self.author,
+                            group=self.group)
+        client = Client()
+        url = reverse('stats:dashboard')
+        self.assertEqual(client.get(url).status_code, 302)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        client.force_login(staff)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        for query in queries:
+            self.assertNotIn('posts_post', query['sql'])
+            self.assertNotIn('posts_comment', query['sql'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['days'][0].posts, 1)
+        self.assertEqual(response.context['groups'][0]['posts'], 1)
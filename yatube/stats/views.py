@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import render
+
+from .rollups import summary
+
+
+@staff_member_required
+def dashboard(request):
+    template = 'stats/dashboard.html'
+    return render(request, template, summary(settings.STATS_DASHBOARD_DAYS))
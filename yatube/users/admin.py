@@ -0,0 +1,27 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from posts.purge import soft_delete_user
+
+User = get_user_model()
+
+
+class SoftDeleteUserAdmin(UserAdmin):
+    '''Удалённый пользователь блокируется, данные стирает purge_deleted'''
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        return ([str(obj) for obj in objs],
+                {User._meta.verbose_name_plural: len(objs)}, set(), [])
+
+    def delete_model(self, request, obj):
+        soft_delete_user(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            soft_delete_user(user)
+
+
+admin.site.unregister(User)
+admin.site.register(User, SoftDeleteUserAdmin)
@@ -1,4 +1,7 @@
 import os
+from importlib.util import find_spec
+
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -7,11 +10,26 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
 
+# Профиль окружения: dev, test или prod (переменная YATUBE_ENV)
+ENV_PROFILES = ('dev', 'test', 'prod')
+YATUBE_ENV = os.environ.get('YATUBE_ENV', 'dev')
+if YATUBE_ENV not in ENV_PROFILES:
+    raise ImproperlyConfigured(f'YATUBE_ENV должен быть одним из {ENV_PROFILES}')
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = '*s*a2h_)213ypz(durvtg!awg=mqh1-&^4(=1^%!#4*ygx3^@+'
+# Ключ по умолчанию годится только для dev и test
+if YATUBE_ENV == 'prod' and not os.environ.get('YATUBE_SECRET_KEY'):
+    raise ImproperlyConfigured('В prod нужно задать YATUBE_SECRET_KEY')
+SECRET_KEY = os.environ.get(
+    'YATUBE_SECRET_KEY', '*s*a2h_)213ypz(durvtg!awg=mqh1-&^4(=1^%!#4*ygx3^@+')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = YATUBE_ENV != 'prod'
+
+# debug_toolbar подключается только в dev и только если он установлен
+DEBUG_TOOLBAR_ENABLED: bool = (
+    os.environ.get('YATUBE_DEBUG_TOOLBAR', str(YATUBE_ENV == 'dev')) == 'True'
+    and find_spec('debug_toolbar') is not None)
 
 ALLOWED_HOSTS = ["*"]
 
@@ -23,6 +41,7 @@ ALLOWED_HOSTS = [
     #'www.bekurin.pythonanywhere.com',
     #'bekurin.pythonanywhere.com',
 ]
+ALLOWED_HOSTS += os.environ.get('YATUBE_ALLOWED_HOSTS', '').split()
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -40,39 +59,63 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
+    'notifications.apps.NotificationsConfig',
+    'stats.apps.StatsConfig',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
+    'core.timing.TimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.pagecache.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.ratelimit.RateLimitMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+if DEBUG_TOOLBAR_ENABLED:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
+if YATUBE_ENV == 'test':
+    # Быстрый хешер: пароли в тестах не нужно защищать
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+YATUBE_TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, который отмечает фазу template, см. core.timing
+        'BACKEND': 'core.timing.DjangoTemplates',
+        'NAME': 'django',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
+        'APP_DIRS': DEBUG,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'notifications.context_processors.unread',
             ],
         },
     },
 ]
+if not DEBUG:
+    # В разработке шаблоны перечитываются, в бою разбираются один раз
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', YATUBE_TEMPLATE_LOADERS)]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
@@ -82,15 +125,52 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # sqlite3 с пулом соединений, см. core.db_backends.pool
+        'ENGINE': 'core.db_backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': 10,
+            'MAX_AGE': 600,
+            'TIMEOUT': 5.0,
+            'HEALTH_CHECK': True,
+        },
     }
 }
+# Настройка каждого соединения SQLite, см. core.db.setup_sqlite
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+SQLITE_LOCK_RETRIES: int = 3
+SQLITE_LOCK_RETRY_DELAY: float = 0.05
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+# Кеш, общий для всех процессов: в нём лежит то, что пишет один процесс,
+# а читают остальные. В prod нужен memcached (YATUBE_SHARED_CACHE —
+# host:port); в dev и test процесс один, и это тот же кеш в памяти
+if YATUBE_ENV == 'prod' and not os.environ.get('YATUBE_SHARED_CACHE'):
+    raise ImproperlyConfigured('В prod нужно задать YATUBE_SHARED_CACHE')
+CACHES['shared'] = ({
+    'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+    'LOCATION': os.environ['YATUBE_SHARED_CACHE'],
+} if os.environ.get('YATUBE_SHARED_CACHE') else CACHES['default'])
+
+# Кеш страниц для анонимов: в режиме отладки выключен
+PAGE_CACHE_ENABLED: bool = not DEBUG
+PAGE_CACHE_ALIAS = 'default'
+# Версии тегов сброса — в общем кеше, иначе сброс из одного процесса
+# (или из команды) не увидят остальные
+PAGE_CACHE_TAG_ALIAS = 'shared'
+PAGE_CACHE_TIMEOUT: int = 60
+PAGE_CACHE_STALE: int = 300
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -134,14 +214,146 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Картинки пишутся на диск по мере загрузки, см. core.uploads
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.StreamingImageUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+IMAGE_UPLOAD_MAX_SIZE: int = 20 * 2 ** 20
+IMAGE_UPLOAD_MAX_SIDE: int = 10000
+IMAGE_UPLOAD_MAX_PIXELS: int = 50 * 10 ** 6
+IMAGE_UPLOAD_HEADER_LIMIT: int = 256 * 2 ** 10
+IMAGE_UPLOAD_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+# По умолчанию — MEDIA_ROOT/tmp
+IMAGE_UPLOAD_TEMP_DIR = None
+# Нормализация при загрузке, см. core.images; 0 процессов — без пула
+IMAGE_MAX_SIDE: int = 2048
+IMAGE_QUALITY: int = 85
+IMAGE_KEEP_ORIGINALS = False
+IMAGE_NORMALIZE_WORKERS: int = 0 if DEBUG else 2
+
+# Метаданные миниатюр: LRU процесса поверх кеша и базы, см. core.thumbnails
+THUMBNAIL_KVSTORE = 'core.thumbnails.KVStore'
+THUMBNAIL_BACKEND = 'core.timing.ThumbnailBackend'
+THUMBNAIL_LRU_SIZE: int = 5000
+THUMBNAIL_LRU_TIMEOUT: int = 5 * 60
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Очередь писем: реальная отправка идёт командой send_queued_mail
+MAIL_QUEUE_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+MAIL_QUEUE_BATCH_SIZE: int = 50
+MAIL_QUEUE_MAX_ATTEMPTS: int = 5
+MAIL_QUEUE_RETRY_DELAY: int = 60
+# Через сколько секунд письмо, зависшее в отправке, берётся снова
+MAIL_QUEUE_CLAIM_TIMEOUT: int = 10 * 60
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 NUMBER_OF_POSTS: int = 10
 LEN_OF_POSTS: int = 15
+# Длина начала поста в лентах, символов
+POST_EXCERPT_LENGTH: int = 300
 FIRST_OF_POSTS: int = 10
+RECOMMENDATIONS_TOP_K: int = 5
+# Подписки в общем кеше: сброс после follow виден всем процессам
+FOLLOWING_CACHE = 'shared'
+FOLLOWING_CACHE_TIMEOUT: int = 60 * 60
+
+# Посты старше срока переносит в архив команда archive_posts
+ARCHIVE_AFTER_DAYS: int = 2 * 365
+ARCHIVE_BATCH_SIZE: int = 500
+
+# Помеченное удалённым стирает команда purge_deleted
+PURGE_BATCH_SIZE: int = 500
+
+# gc_media не удаляет файлы моложе этого срока, сек.
+MEDIA_GC_MIN_AGE: int = 24 * 60 * 60
+
+# Профили запросов, см. core.profiling; 0.01 — каждый сотый запрос
+PROFILING_SAMPLE_RATE: float = 0.0
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILING_TOKEN_MAX_AGE: int = 60 * 60
+# Сколько последних профилей хранить в каталоге одного view
+PROFILING_MAX_FILES: int = 200
+
+# JSON-строка с фазами каждого запроса в логгер yatube.timing
+REQUEST_TIMING_ENABLED: bool = True
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {'message': {'format': '%(message)s'}},
+    'handlers': {'timing': {'class': 'logging.StreamHandler',
+                            'formatter': 'message'}},
+    'loggers': {'yatube.timing': {
+        'handlers': ['timing'],
+        # В тестах строки мешали бы выводу прогона
+        'level': 'WARNING' if YATUBE_ENV == 'test' else 'INFO',
+        'propagate': False,
+    }},
+}
+
+# Уведомления рассылает команда fanout_notifications
+NOTIFICATIONS_BATCH_SIZE: int = 500
+NOTIFICATIONS_PAGE_SIZE: int = 50
+NOTIFICATIONS_UNREAD_TIMEOUT: int = 10 * 60
+
+# Дневные агрегаты; rebuild_stats запускается раз в сутки
+STATS_DASHBOARD_DAYS: int = 30
+STATS_REBUILD_DAYS: int = 2
+
+# Лимиты частоты по имени view, см. core.ratelimit; methods по умолчанию POST
+RATELIMIT_ENABLED: bool = not DEBUG
+# Счётчики должны быть общими для всех воркеров: в кеше процесса лимит
+# умножается на число процессов, а LocMemCache ещё и вытесняет ключи.
+# Поэтому только 'shared', который в prod обязан быть memcached
+RATELIMIT_CACHE = 'shared'
+RATELIMITS = {
+    'posts:add_comment': {'rate': '10/m'},
+    'posts:post_create': {'rate': '5/m'},
+    'posts:post_edit': {'rate': '20/m'},
+    'posts:profile_follow': {'rate': '30/m', 'methods': ('GET',)},
+    'posts:profile_unfollow': {'rate': '30/m', 'methods': ('GET',)},
+    'users:signup': {'rate': '5/h'},
+    'users:login': {'rate': '10/m'},
+    'api:batch_posts': {'rate': '5/m'},
+    'api:batch_comments': {'rate': '10/m'},
+    'api:batch_follows': {'rate': '10/m'},
+}
+
+# Популярное: интервалы счётчиков и затухание оценки, в секундах
+TRENDING_BUCKET: int = 60 * 60
+TRENDING_WINDOW: int = 48 * 60 * 60
+TRENDING_HALF_LIFE: int = 6 * 60 * 60
+TRENDING_REFRESH: int = 5 * 60
+TRENDING_FLUSH_INTERVAL: int = 30
+TRENDING_SIZE: int = 10
+# Топ считает refresh_trending в отдельном процессе, читают воркеры
+TRENDING_CACHE = 'shared'
+
+# Просмотры постов копятся в памяти и пишутся в базу пачкой
+VIEW_COUNTER_FLUSH_INTERVAL: int = 30
+# Фоновые потоки счётчиков и пересборки лент; в тестах flush явный
+COUNTER_FLUSH_THREAD: bool = YATUBE_ENV != 'test'
+
+API_PAGE_SIZE: int = 20
+API_MAX_PAGE_SIZE: int = 100
+API_BATCH_LIMIT: int = 100
+
+# Адрес сайта для абсолютных ссылок в заранее собранных RSS/Atom;
+# все ленты собираются от него, а не от хоста запроса
+if YATUBE_ENV == 'prod' and not os.environ.get('YATUBE_SITE_URL'):
+    raise ImproperlyConfigured('В prod нужно задать YATUBE_SITE_URL')
+SITE_URL = os.environ.get('YATUBE_SITE_URL', 'http://127.0.0.1:8000')
+FEED_SIZE: int = 20
+# Снимки лент лежат в общем кеше, чтобы пересборку видели все процессы
+FEED_CACHE = 'shared'
+FEED_CACHE_TIMEOUT: int = 24 * 60 * 60
+# Помеченные ленты пересобираются фоновым потоком раз в столько секунд
+FEED_RERENDER_DELAY: int = 5